@@ -1,11 +1,142 @@
+import asyncio
+import os
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
 from settings.settings import settings
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 
-def pg_connection() -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(
+def _database_url() -> str:
+    if settings.database_url:
+        url = settings.database_url
+        if url.startswith("sqlite://"):
+            url = url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+        return url
+
+    return (
         f"postgresql+asyncpg://{settings.pg.username}:{settings.pg.password}@"
-        f"postgres:{settings.pg.port}/{settings.pg.database}"
+        f"{settings.pg.host}:{settings.pg.port}/{settings.pg.database}"
     )
 
-    return async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def _pool_limits() -> tuple[int, int]:
+    """
+    pool_size и max_overflow одного воркера: бюджет pg.max_connections делится между воркерами.
+    При нескольких воркерах rolling reload на время замены держит ещё один -- делим на workers + 1.
+    """
+    pool_size, max_overflow = settings.pg.pool_size, settings.pg.max_overflow
+    if settings.pg.max_connections is not None:
+        workers = settings.uvicorn.workers
+        processes = workers + 1 if workers > 1 else 1
+        per_worker = max(1, settings.pg.max_connections // processes)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = per_worker - pool_size
+    return pool_size, max_overflow
+
+
+class EngineRegistry:
+    """
+    Один движок (и один пул соединений) на процесс.
+
+    Движки создаются лениво при первом обращении, поэтому в дочерних процессах
+    после fork у каждого воркера оказывается собственный пул.
+    """
+
+    def __init__(self) -> None:
+        self._engines: dict[str, AsyncEngine] = {}
+        self._sessionmakers: dict[str, async_sessionmaker[AsyncSession]] = {}
+
+    def _create_engine(self, url: str) -> AsyncEngine:
+        kwargs: dict[str, Any] = {"echo": settings.pg.echo}
+
+        if url.startswith("sqlite"):
+            # В SQLite нет схемы public, которую проставляют модели
+            engine = create_async_engine(url, **kwargs).execution_options(
+                schema_translate_map={"public": None})
+            logger.info(f"Using SQLite database: {url}")
+            return engine
+
+        pool_size, max_overflow = _pool_limits()
+        if settings.pg.null_pool:
+            kwargs["poolclass"] = NullPool
+        else:
+            kwargs.update(
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=settings.pg.pool_timeout,
+                pool_recycle=settings.pg.pool_recycle,
+                pool_pre_ping=settings.pg.pool_pre_ping,
+            )
+        engine = create_async_engine(url, **kwargs)
+        logger.info(f"Using PostgreSQL database at {settings.pg.host}:{settings.pg.port}/{settings.pg.database} "
+                    f"(pool_size={pool_size}, max_overflow={max_overflow}, "
+                    f"null_pool={settings.pg.null_pool})")
+        return engine
+
+    def get_engine(self, name: str = "default", url: Optional[str] = None) -> AsyncEngine:
+        engine = self._engines.get(name)
+        if engine is None:
+            engine = self._create_engine(url or _database_url())
+            self._engines[name] = engine
+        return engine
+
+    def get_sessionmaker(self, name: str = "default") -> async_sessionmaker[AsyncSession]:
+        sessionmaker = self._sessionmakers.get(name)
+        if sessionmaker is None:
+            sessionmaker = async_sessionmaker(
+                bind=self.get_engine(name), autoflush=False, expire_on_commit=False)
+            self._sessionmakers[name] = sessionmaker
+        return sessionmaker
+
+    def pool_stats(self) -> dict[str, dict[str, Any]]:
+        """Текущее состояние пулов всех созданных движков."""
+        stats = {}
+        for name, engine in self._engines.items():
+            pool = engine.pool
+            pool_info: dict[str, Any] = {"pool_class": type(pool).__name__, "status": pool.status()}
+            for metric in ("size", "checkedin", "checkedout", "overflow"):
+                getter = getattr(pool, metric, None)
+                if callable(getter):
+                    pool_info[metric] = getter()
+            stats[name] = pool_info
+        return stats
+
+    async def warm_up(self, name: str = "default") -> int:
+        """Открывает pool_size соединений заранее, чтобы первые запросы не ждали подключения к БД."""
+        engine = self.get_engine(name)
+        size = getattr(engine.pool, "size", None)
+        count = size() if callable(size) else 1
+        connections = await asyncio.gather(*(engine.connect() for _ in range(count)))
+        await asyncio.gather(*(connection.close() for connection in connections))
+        return count
+
+    def after_fork(self) -> None:
+        """
+        Забыть движки, унаследованные от родителя при fork.
+
+        Соединения родителя не закрываются (``close=False``) -- ими продолжает пользоваться
+        родитель, а воркер откроет собственный пул при первом обращении.
+        """
+        for engine in self._engines.values():
+            engine.sync_engine.dispose(close=False)
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+    async def dispose_all(self) -> None:
+        for name, engine in self._engines.items():
+            await engine.dispose()
+            logger.info(f"Engine '{name}' disposed")
+        self._engines.clear()
+        self._sessionmakers.clear()
+
+
+engine_registry = EngineRegistry()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=engine_registry.after_fork)
+
+
+def pg_connection() -> async_sessionmaker[AsyncSession]:
+    return engine_registry.get_sessionmaker()
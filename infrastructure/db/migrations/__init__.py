@@ -0,0 +1,143 @@
+"""
+Версионные миграции схемы БД.
+
+Каждая миграция -- модуль в ``versions/`` с полями ``revision``, ``description``
+и корутиной ``upgrade(conn)``. Применённые ревизии хранятся в таблице
+``schema_migrations``. ``check_schema`` сверяет живую БД с ``Base.metadata``.
+"""
+import importlib
+import pkgutil
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from infrastructure.db.connection import engine_registry
+from infrastructure.db.migrations import versions
+from persistent.db.base import Base
+from persistent.db import favorite_mentor, mentor, mentor_time, request  # noqa: F401 -- регистрируют модели
+
+_migrations_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migrations_metadata,
+    Column("revision", String, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.current_timestamp()),
+)
+
+# Произвольный ключ advisory lock, чтобы два процесса не мигрировали одновременно
+_ADVISORY_LOCK_KEY = 7_340_021
+
+
+class SchemaOutdatedError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    revision: str
+    description: str
+    upgrade: Callable[[AsyncConnection], Awaitable[None]]
+
+
+def load_migrations() -> list[Migration]:
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        migrations.append(Migration(module.revision, module.description, module.upgrade))
+    migrations.sort(key=lambda migration: migration.revision)
+    return migrations
+
+
+async def applied_revisions(conn: AsyncConnection) -> set[str]:
+    await conn.run_sync(lambda sync_conn: _migrations_metadata.create_all(sync_conn, checkfirst=True))
+    resp = await conn.execute(select(schema_migrations.c.revision))
+    return {row[0] for row in resp.fetchall()}
+
+
+async def upgrade(engine: Optional[AsyncEngine] = None) -> list[str]:
+    """Применяет все ещё не применённые миграции, каждую в своей транзакции."""
+    engine = engine or engine_registry.get_engine()
+    applied_now = []
+
+    for migration in load_migrations():
+        async with engine.begin() as conn:
+            if conn.dialect.name == "postgresql":
+                await conn.execute(text(f"SELECT pg_advisory_xact_lock({_ADVISORY_LOCK_KEY})"))
+            if migration.revision in await applied_revisions(conn):
+                continue
+            logger.info(f"Applying migration {migration.revision}: {migration.description}")
+            await migration.upgrade(conn)
+            await conn.execute(schema_migrations.insert().values(
+                revision=migration.revision, description=migration.description))
+            applied_now.append(migration.revision)
+
+    if applied_now:
+        logger.info(f"Migrations applied: {applied_now}")
+    else:
+        logger.info("Schema is up to date, nothing to apply")
+    return applied_now
+
+
+def _model_schema_diff(sync_conn) -> list[str]:
+    inspector = inspect(sync_conn)
+    use_schema = sync_conn.dialect.name != "sqlite"
+    problems = []
+
+    for table in Base.metadata.sorted_tables:
+        schema = table.schema if use_schema else None
+        if not inspector.has_table(table.name, schema=schema):
+            problems.append(f"missing table {table.name}")
+            continue
+
+        live_columns = {column["name"] for column in inspector.get_columns(table.name, schema=schema)}
+        for column in table.columns:
+            if column.name not in live_columns:
+                problems.append(f"missing column {table.name}.{column.name}")
+
+        live_indexes = {index["name"] for index in inspector.get_indexes(table.name, schema=schema)}
+        for index in table.indexes:
+            if index.name and index.name not in live_indexes:
+                problems.append(f"missing index {index.name} on {table.name}")
+
+    return problems
+
+
+async def check_schema(engine: Optional[AsyncEngine] = None) -> list[str]:
+    """Возвращает список расхождений живой схемы с миграциями и моделями (пустой -- всё ок)."""
+    engine = engine or engine_registry.get_engine()
+    async with engine.connect() as conn:
+        applied = await applied_revisions(conn)
+        problems = [f"migration {migration.revision} ({migration.description}) is not applied"
+                    for migration in load_migrations() if migration.revision not in applied]
+        problems.extend(await conn.run_sync(_model_schema_diff))
+        await conn.commit()
+    return problems
+
+
+async def ensure_schema_up_to_date(engine: Optional[AsyncEngine] = None) -> None:
+    problems = await check_schema(engine)
+    if problems:
+        for problem in problems:
+            logger.error(f"Schema check: {problem}")
+        raise SchemaOutdatedError(
+            "Database schema lags the models, run `python -m infrastructure.db.migrations upgrade`: "
+            + "; ".join(problems))
+    logger.info("Schema check passed")
+
+
+def render_model_ddl(dialect_name: str = "postgresql") -> str:
+    """DDL всех таблиц и индексов из ``Base.metadata`` -- заготовка для новой миграции."""
+    from sqlalchemy.dialects import postgresql, sqlite
+
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[dialect_name].dialect()
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)).strip() + ";")
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)).strip() + ";")
+    return "\n\n".join(statements)
@@ -0,0 +1,47 @@
+"""
+python -m infrastructure.db.migrations upgrade   -- применить миграции
+python -m infrastructure.db.migrations current   -- показать применённые ревизии
+python -m infrastructure.db.migrations check     -- сверить схему с моделями (код 1 при расхождении)
+python -m infrastructure.db.migrations ddl [postgresql|sqlite] -- DDL из Base.metadata
+"""
+import asyncio
+import sys
+
+from infrastructure.db.connection import engine_registry
+from infrastructure.db.migrations import applied_revisions, check_schema, render_model_ddl, upgrade
+
+
+async def _current() -> None:
+    async with engine_registry.get_engine().begin() as conn:
+        for revision in sorted(await applied_revisions(conn)):
+            print(revision)
+
+
+async def _check() -> int:
+    problems = await check_schema()
+    for problem in problems:
+        print(problem)
+    return 1 if problems else 0
+
+
+async def main(argv: list[str]) -> int:
+    command = argv[0] if argv else "upgrade"
+    try:
+        if command == "upgrade":
+            await upgrade()
+        elif command == "current":
+            await _current()
+        elif command == "check":
+            return await _check()
+        elif command == "ddl":
+            print(render_model_ddl(argv[1] if len(argv) > 1 else "postgresql"))
+        else:
+            print(__doc__)
+            return 2
+        return 0
+    finally:
+        await engine_registry.dispose_all()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,70 @@
+"""
+Исходная схема: таблицы mentors, mentor_time, requests, favorite_mentors.
+
+Снимок ``Base.metadata`` на момент введения миграций. Для БД, созданных старым
+init.sql, добавляет недостающие колонки mentors (role, experience_periods, hackathons, work).
+"""
+from sqlalchemy import (Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, Time,
+                        UniqueConstraint, Uuid, func, inspect)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+revision = "0001"
+description = "initial schema"
+
+metadata = MetaData()
+
+mentors = Table(
+    "mentors", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("telegram_id", String, nullable=False, unique=True),
+    Column("name", String, nullable=False),
+    Column("info", Text, nullable=False),
+    Column("about", Text),
+    Column("specification", Text),
+    Column("role", Text),
+    Column("experience_periods", Text),
+    Column("hackathons", Text),
+    Column("work", Text),
+)
+
+mentor_time = Table(
+    "mentor_time", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("day", Integer, nullable=False),
+    Column("time_start", Time, nullable=False),
+    Column("time_end", Time, nullable=False),
+    Column("mentor_id", Uuid, ForeignKey("mentors.id", ondelete="CASCADE")),
+)
+
+requests = Table(
+    "requests", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("call_type", Boolean, nullable=False),
+    Column("time_sended", DateTime, nullable=False, server_default=func.current_timestamp()),
+    Column("mentor_id", Uuid, ForeignKey("mentors.id", ondelete="CASCADE")),
+    Column("guest_id", Uuid, nullable=False),
+    Column("description", Text, nullable=False),
+    Column("call_time", DateTime),
+    Column("response", Integer, nullable=False, server_default="0"),
+)
+
+favorite_mentors = Table(
+    "favorite_mentors", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("user_id", Uuid, nullable=False),
+    Column("mentor_id", Uuid, ForeignKey("mentors.id", ondelete="CASCADE")),
+    UniqueConstraint("user_id", "mentor_id"),
+)
+
+
+def _add_missing_columns(sync_conn) -> None:
+    live_columns = {column["name"] for column in inspect(sync_conn).get_columns("mentors")}
+    for column in mentors.columns:
+        if column.name not in live_columns:
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            sync_conn.exec_driver_sql(f"ALTER TABLE mentors ADD COLUMN {column.name} {column_type}")
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.run_sync(lambda sync_conn: metadata.create_all(sync_conn, checkfirst=True))
+    await conn.run_sync(_add_missing_columns)
@@ -0,0 +1,21 @@
+"""
+Индексы под горячие запросы: requests по ментору/времени/гостю,
+частичный индекс неотвеченных запросов и mentor_time по (mentor_id, day).
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+revision = "0002"
+description = "hot query indexes"
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS ix_requests_mentor_id_call_time ON requests (mentor_id, call_time)",
+    "CREATE INDEX IF NOT EXISTS ix_requests_guest_id ON requests (guest_id)",
+    "CREATE INDEX IF NOT EXISTS ix_requests_pending_by_mentor ON requests (mentor_id, call_type) WHERE response = 0",
+    "CREATE INDEX IF NOT EXISTS ix_mentor_time_mentor_id_day ON mentor_time (mentor_id, day)",
+]
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
@@ -0,0 +1,51 @@
+"""
+Колонка ``mentors.availability_bitmap`` -- неделя ментора в виде 336-битной карты
+получасовых слотов, заполняется по текущим строкам ``mentor_time``.
+"""
+from collections import defaultdict
+
+from sqlalchemy import Column, Integer, LargeBinary, MetaData, Table, Time, Uuid, inspect, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from utils.availability_bitmap import bitmap_from_intervals, bitmap_to_bytes
+
+revision = "0003"
+description = "mentor availability bitmap"
+
+metadata = MetaData()
+
+mentors = Table(
+    "mentors", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("availability_bitmap", LargeBinary),
+)
+
+mentor_time = Table(
+    "mentor_time", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("day", Integer, nullable=False),
+    Column("time_start", Time, nullable=False),
+    Column("time_end", Time, nullable=False),
+    Column("mentor_id", Uuid),
+)
+
+
+def _add_column(sync_conn) -> None:
+    live_columns = {column["name"] for column in inspect(sync_conn).get_columns("mentors")}
+    if "availability_bitmap" not in live_columns:
+        column_type = LargeBinary().compile(dialect=sync_conn.dialect)
+        sync_conn.exec_driver_sql(f"ALTER TABLE mentors ADD COLUMN availability_bitmap {column_type}")
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.run_sync(_add_column)
+
+    resp = await conn.execute(select(mentor_time.c.mentor_id, mentor_time.c.day,
+                                     mentor_time.c.time_start, mentor_time.c.time_end))
+    intervals_by_mentor = defaultdict(list)
+    for mentor_id, day, time_start, time_end in resp.all():
+        intervals_by_mentor[mentor_id].append((day, time_start, time_end))
+
+    for mentor_id, intervals in intervals_by_mentor.items():
+        await conn.execute(mentors.update().where(mentors.c.id == mentor_id)
+                           .values(availability_bitmap=bitmap_to_bytes(bitmap_from_intervals(intervals))))
@@ -0,0 +1,34 @@
+"""
+Уникальный частичный индекс на requests (mentor_id, call_time) для ожидающих
+и принятых запросов: двойное бронирование теперь отсекает сама БД.
+
+Перед созданием индекса уже существующие дубли отменяются (response = 2):
+остаётся принятый запрос, среди равных -- отправленный раньше.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+revision = "0004"
+description = "unique active call time per mentor"
+
+CANCEL_DUPLICATES = """
+UPDATE requests SET response = 2
+WHERE response IN (0, 1) AND call_time IS NOT NULL AND EXISTS (
+    SELECT 1 FROM requests other
+    WHERE other.mentor_id = requests.mentor_id
+      AND other.call_time = requests.call_time
+      AND other.response IN (0, 1)
+      AND (other.response > requests.response
+           OR (other.response = requests.response AND other.time_sended < requests.time_sended)
+           OR (other.response = requests.response AND other.time_sended = requests.time_sended
+               AND other.id < requests.id))
+)
+"""
+
+CREATE_INDEX = ("CREATE UNIQUE INDEX IF NOT EXISTS uq_requests_active_call_time "
+                "ON requests (mentor_id, call_time) WHERE response IN (0, 1)")
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.execute(text(CANCEL_DUPLICATES))
+    await conn.execute(text(CREATE_INDEX))
@@ -0,0 +1,129 @@
+"""
+Промежутки ``mentor_time`` как отрезки минут недели: колонки ``minute_start``/``minute_end``.
+
+На PostgreSQL -- исключающее ограничение на GiST (btree_gist) по
+``(mentor_id, int4range(minute_start, minute_end, '[]'))``: промежутки одного
+ментора не пересекаются, и ``CHECK (time_start <= time_end)``. Чтобы их можно было
+создать, строки с началом позже конца (базовая схема их не запрещала) удаляются,
+а уже пересекающиеся и соприкасающиеся промежутки сливаются. На SQLite -- обычный
+btree-индекс.
+"""
+from collections import defaultdict
+from datetime import time
+
+from loguru import logger
+from sqlalchemy import Column, Integer, MetaData, Table, Time, Uuid, bindparam, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from utils.intervals import MINUTES_PER_DAY, minute_of_week
+
+revision = "0005"
+description = "mentor_time minute-of-week ranges"
+
+metadata = MetaData()
+
+mentor_time = Table(
+    "mentor_time", metadata,
+    Column("id", Uuid, primary_key=True),
+    Column("day", Integer, nullable=False),
+    Column("time_start", Time, nullable=False),
+    Column("time_end", Time, nullable=False),
+    Column("minute_start", Integer),
+    Column("minute_end", Integer),
+    Column("mentor_id", Uuid),
+)
+
+
+def _add_columns(sync_conn) -> None:
+    live_columns = {column["name"] for column in inspect(sync_conn).get_columns("mentor_time")}
+    for name in ("minute_start", "minute_end"):
+        if name not in live_columns:
+            sync_conn.exec_driver_sql(f"ALTER TABLE mentor_time ADD COLUMN {name} INTEGER")
+
+
+def _merge_overlaps(rows) -> tuple[list[dict], list]:
+    """
+    Строки ``(id, mentor_id, minute_start, minute_end)`` -> (новые границы поглотивших
+    строк, id поглощённых строк на удаление).
+    """
+    by_mentor = defaultdict(list)
+    for row in rows:
+        by_mentor[row.mentor_id].append(row)
+
+    updates, delete_ids = [], []
+    for mentor_rows in by_mentor.values():
+        mentor_rows.sort(key=lambda row: (row.minute_start, row.minute_end))
+        groups = []
+        for row in mentor_rows:
+            if groups and row.minute_start <= groups[-1]["_end"]:
+                groups[-1]["_end"] = max(groups[-1]["_end"], row.minute_end)
+                groups[-1]["absorbed"].append(row.id)
+            else:
+                groups.append({"_id": row.id, "_start": row.minute_start, "_end": row.minute_end, "absorbed": []})
+
+        for group in groups:
+            if group["absorbed"]:
+                delete_ids.extend(group.pop("absorbed"))
+                updates.append(dict(group, _time_start=_minute_to_time(group["_start"]),
+                                    _time_end=_minute_to_time(group["_end"])))
+    return updates, delete_ids
+
+
+def _minute_to_time(minute: int) -> time:
+    minute %= MINUTES_PER_DAY
+    return time(minute // 60, minute % 60)
+
+
+async def _delete_inverted(conn: AsyncConnection) -> None:
+    """Промежутки с началом позже конца: отрезок для них не построить, а смысл не восстановить."""
+    resp = await conn.execute(select(mentor_time.c.id, mentor_time.c.mentor_id, mentor_time.c.day,
+                                     mentor_time.c.time_start, mentor_time.c.time_end)
+                              .where(mentor_time.c.time_start > mentor_time.c.time_end))
+    inverted = resp.all()
+    if not inverted:
+        return
+    for row in inverted:
+        logger.warning(f"Deleting inverted mentor_time {row.id} of mentor {row.mentor_id}: "
+                       f"day {row.day}, {row.time_start} > {row.time_end}")
+    await conn.execute(mentor_time.delete().where(mentor_time.c.id.in_([row.id for row in inverted])))
+    logger.warning(f"Deleted {len(inverted)} inverted mentor_time rows")
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    await conn.run_sync(_add_columns)
+    await _delete_inverted(conn)
+
+    resp = await conn.execute(select(mentor_time.c.id, mentor_time.c.day,
+                                     mentor_time.c.time_start, mentor_time.c.time_end))
+    backfill = [{"_id": row.id,
+                 "_start": minute_of_week(row.day, row.time_start),
+                 "_end": minute_of_week(row.day, row.time_end)} for row in resp.all()]
+    set_minutes = (mentor_time.update().where(mentor_time.c.id == bindparam("_id"))
+                   .values(minute_start=bindparam("_start"), minute_end=bindparam("_end")))
+    if backfill:
+        await conn.execute(set_minutes, backfill)
+
+    resp = await conn.execute(select(mentor_time.c.id, mentor_time.c.mentor_id,
+                                     mentor_time.c.minute_start, mentor_time.c.minute_end))
+    updates, delete_ids = _merge_overlaps(resp.all())
+    if delete_ids:
+        await conn.execute(mentor_time.delete().where(mentor_time.c.id.in_(delete_ids)))
+        await conn.execute(
+            mentor_time.update().where(mentor_time.c.id == bindparam("_id"))
+            .values(minute_start=bindparam("_start"), minute_end=bindparam("_end"),
+                    time_start=bindparam("_time_start"), time_end=bindparam("_time_end")),
+            updates)
+
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_mentor_time_mentor_id_minutes "
+                            "ON mentor_time (mentor_id, minute_start, minute_end)"))
+
+    if conn.dialect.name == "postgresql":
+        await conn.execute(text("ALTER TABLE mentor_time ALTER COLUMN minute_start SET NOT NULL"))
+        await conn.execute(text("ALTER TABLE mentor_time ALTER COLUMN minute_end SET NOT NULL"))
+        await conn.execute(text(
+            "ALTER TABLE mentor_time ADD CONSTRAINT ck_mentor_time_start_before_end "
+            "CHECK (time_start <= time_end)"))
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        await conn.execute(text(
+            "ALTER TABLE mentor_time ADD CONSTRAINT ex_mentor_time_no_overlap "
+            "EXCLUDE USING gist (mentor_id WITH =, int4range(minute_start, minute_end, '[]') WITH &&)"))
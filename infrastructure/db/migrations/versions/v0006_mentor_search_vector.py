@@ -0,0 +1,32 @@
+"""
+Полнотекстовый поиск по профилю ментора (только PostgreSQL).
+
+``mentors.search_vector`` -- генерируемая колонка tsvector (конфигурация 'simple',
+без стемминга: имена и названия технологий) с весами A: name, B: specification/role,
+C: info/about, D: hackathons/work. GIN-индекс ``ix_mentors_search_vector``.
+На SQLite поиск идёт через LIKE, миграция ничего не делает.
+"""
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+revision = "0006"
+description = "mentor full-text search vector"
+
+STATEMENTS = [
+    """
+    ALTER TABLE mentors ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(specification, '') || ' ' || coalesce(role, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(info, '') || ' ' || coalesce(about, '')), 'C') ||
+        setweight(to_tsvector('simple', coalesce(hackathons, '') || ' ' || coalesce(work, '')), 'D')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_mentors_search_vector ON mentors USING gin (search_vector)",
+]
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    if conn.dialect.name != "postgresql":
+        return
+    for statement in STATEMENTS:
+        await conn.execute(text(statement))
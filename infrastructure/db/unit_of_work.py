@@ -0,0 +1,106 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Optional
+
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.db.connection import pg_connection
+
+_current_unit_of_work: ContextVar[Optional["UnitOfWork"]] = ContextVar("current_unit_of_work", default=None)
+
+
+class UnitOfWork:
+    """
+    Одна сессия и одна транзакция на весь блок.
+
+    Пока блок активен, все репозитории работают через его сессию и не коммитят сами.
+    Вложенный UnitOfWork присоединяется к внешнему, коммит делает только внешний.
+    """
+
+    def __init__(self, sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None) -> None:
+        self._sessionmaker = sessionmaker or pg_connection()
+        self._outer: Optional[UnitOfWork] = None
+        self._token = None
+        self._after_commit: list[Callable[[], None]] = []
+        self._has_writes = False
+        self.session: Optional[AsyncSession] = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        outer = _current_unit_of_work.get()
+        if outer is not None:
+            self._outer = outer
+            self.session = outer.session
+            return self
+
+        self.session = self._sessionmaker()
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self._outer is not None:
+            return False
+
+        try:
+            if exc_type is None:
+                await self.session.commit()
+            else:
+                await self.session.rollback()
+                logger.debug(f"Unit of work rolled back: {exc_type.__name__}")
+        finally:
+            await self.session.close()
+            _current_unit_of_work.reset(self._token)
+
+        if exc_type is None:
+            callbacks, self._after_commit = self._after_commit, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"After-commit callback failed: {e}")
+        return False
+
+    @property
+    def has_writes(self) -> bool:
+        """В блоке уже были записи: прочитанное может быть ещё не закоммичено."""
+        return self._outer.has_writes if self._outer is not None else self._has_writes
+
+    def mark_written(self) -> None:
+        if self._outer is not None:
+            self._outer.mark_written()
+        else:
+            self._has_writes = True
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Выполнить callback после успешного коммита (при откате -- отбросить)."""
+        if self._outer is not None:
+            self._outer.after_commit(callback)
+        else:
+            self._after_commit.append(callback)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current_unit_of_work.get()
+
+
+@asynccontextmanager
+async def session_scope(sessionmaker: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для одного метода репозитория.
+
+    Внутри UnitOfWork отдаёт его сессию без коммита, иначе открывает свою и коммитит на выходе.
+    """
+    unit_of_work = _current_unit_of_work.get()
+    if unit_of_work is not None:
+        yield unit_of_work.session
+        return
+
+    async with sessionmaker() as session:
+        yield session
+        await session.commit()
+
+
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """FastAPI-зависимость: один UnitOfWork на HTTP-запрос."""
+    async with UnitOfWork() as uow:
+        yield uow
@@ -0,0 +1,63 @@
+"""
+Шина изменений данных внутри процесса.
+
+Репозитории публикуют событие после записи (тема + ключ, например id ментора),
+кэши и in-memory индексы подписываются и сбрасывают устаревшие данные.
+Внутри UnitOfWork событие доставляется дважды: сразу и после коммита --
+иначе параллельный запрос мог бы перечитать ещё не закоммиченное состояние
+и закэшировать старые данные. Поэтому слушатели должны быть идемпотентными
+и дешёвыми (пометить/сбросить, а не перечитывать БД).
+События других воркеров приходят через ``infrastructure.shared_cache`` в ``dispatch``.
+"""
+from collections import defaultdict
+from typing import Any, Callable
+
+from loguru import logger
+
+from infrastructure.db.unit_of_work import current_unit_of_work
+
+MENTOR = "mentor"
+MENTOR_TIME = "mentor_time"
+REQUEST = "request"
+
+Listener = Callable[[Any], None]
+Forwarder = Callable[[str, Any], None]
+
+
+class ChangeFeed:
+    def __init__(self) -> None:
+        self._listeners: dict[str, list[Listener]] = defaultdict(list)
+        self._forwarders: list[Forwarder] = []
+
+    def subscribe(self, topic: str, listener: Listener) -> None:
+        self._listeners[topic].append(listener)
+
+    def forward_to(self, forwarder: Forwarder) -> None:
+        """``forwarder(topic, key)`` получает события этого процесса, чтобы разослать их дальше."""
+        self._forwarders.append(forwarder)
+
+    def publish(self, topic: str, key: Any = None) -> None:
+        """``key`` -- id изменённой сущности, ``None`` -- изменилось всё в теме."""
+        self._emit(topic, key)
+        unit_of_work = current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.mark_written()
+            unit_of_work.after_commit(lambda: self._emit(topic, key))
+
+    def _emit(self, topic: str, key: Any) -> None:
+        self.dispatch(topic, key)
+        for forwarder in self._forwarders:
+            try:
+                forwarder(topic, key)
+            except Exception as e:
+                logger.error(f"Change forwarder for '{topic}' failed: {e}")
+
+    def dispatch(self, topic: str, key: Any = None) -> None:
+        for listener in self._listeners.get(topic, ()):
+            try:
+                listener(key)
+            except Exception as e:
+                logger.error(f"Change listener for '{topic}' failed: {e}")
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,314 @@
+"""
+Общий для всех воркеров кэш -- второй уровень после in-process кэшей.
+
+Бэкенд -- Redis (``settings.cache.redis_url``), без него -- ``InMemoryCacheBackend``
+(SQLite-режим, один процесс, тесты). Значения хранятся в JSON по пространствам имён,
+каждое привязано к теме ``change_feed``: событие темы удаляет ключ во всех её
+пространствах и рассылается другим воркерам через pub/sub, а они доставляют его
+своим подписчикам ``change_feed`` (in-process кэши и индексы сбрасываются везде).
+Ошибки бэкенда не ломают запрос: кэш пропускается, данные читаются из БД.
+
+Значение хранится вместе с версией, прочитанной до загрузки из БД: счётчики
+``version:<тема>:<ключ>`` (и ``version:<тема>:reset`` для событий без ключа) растут
+в бэкенде на каждое событие, и при чтении версия значения сверяется с текущей.
+Поэтому значение, записанное уже после инвалидации (воркер прочитал БД до чужого
+коммита, а записал после), ни одному воркеру не отдаётся.
+Счётчик темы ``version:<тема>`` растёт на любое её событие -- из него и счётчиков
+ключей ``infrastructure.versions`` строит ETag. Новые значения счётчиков уходят
+в сообщении вместе с событием. Счётчики хранятся без TTL, поэтому Redis должен
+работать с политикой вытеснения ``noeviction`` или ``volatile-*``.
+"""
+import asyncio
+import json
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from infrastructure.events import change_feed
+from settings.settings import settings
+
+MessageHandler = Callable[[bytes], None]
+VersionsListener = Callable[[dict[str, int]], None]
+
+
+class InMemoryCacheBackend:
+    """Замена Redis внутри одного процесса: словарь с TTL и локальная рассылка."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, tuple[float, bytes]] = {}
+        self._handlers: list[MessageHandler] = []
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return entry[1]
+
+    async def get_many(self, *keys: str) -> list[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def incr_many(self, *keys: str) -> list[int]:
+        values = []
+        for key in keys:
+            value = int(await self.get(key) or 0) + 1
+            self._data[key] = (float("inf"), str(value).encode())
+            values.append(value)
+        return values
+
+    async def set_default(self, key: str, value: bytes) -> bytes:
+        current = await self.get(key)
+        if current is None:
+            self._data[key] = (float("inf"), value)
+            current = value
+        return current
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        for handler in self._handlers:
+            handler(message)
+
+    async def listen(self, channel: str, handler: MessageHandler) -> None:
+        self._handlers.append(handler)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            self._handlers.remove(handler)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str, timeout: float) -> None:
+        from redis import asyncio as redis
+
+        # короткие таймауты: зависший Redis не должен задерживать запросы, кэш просто пропускается
+        self._redis = redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        # подписка ждёт сообщений бесконечно -- отдельный клиент без таймаута чтения
+        self._pubsub_redis = redis.from_url(url, socket_connect_timeout=timeout, health_check_interval=30)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def get_many(self, *keys: str) -> list[Optional[bytes]]:
+        return await self._redis.mget(keys)
+
+    async def incr_many(self, *keys: str) -> list[int]:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            return await pipe.execute()
+
+    async def set_default(self, key: str, value: bytes) -> bytes:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, value, nx=True)
+            pipe.get(key)
+            return (await pipe.execute())[1]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._redis.publish(channel, message)
+
+    async def listen(self, channel: str, handler: MessageHandler) -> None:
+        pubsub = self._pubsub_redis.pubsub(ignore_subscribe_messages=True)
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                handler(message["data"])
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+        await self._pubsub_redis.aclose()
+
+
+def _restore_key(key: Optional[str]) -> Any:
+    # ключи событий -- id сущностей, а подписчики хранят их как UUID
+    if key is None:
+        return None
+    try:
+        return uuid.UUID(key)
+    except ValueError:
+        return key
+
+
+class SharedCache:
+    def __init__(self, backend, ttl: float, prefix: str, channel: str) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self.channel = channel
+        self._origin = uuid.uuid4().hex
+        self._namespaces: dict[str, list[str]] = defaultdict(list)
+        self._topics: dict[str, str] = {}
+        self._versions_listeners: list[VersionsListener] = []
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: set[asyncio.Task] = set()
+        # ключи, удаление которых ещё не дошло до бэкенда: их не читаем и не пишем
+        self._invalidating: Counter[str] = Counter()
+        change_feed.forward_to(self.forward)
+
+    def register(self, namespace: str, topic: str) -> None:
+        """Ключи ``namespace`` удаляются событиями ``topic`` с тем же ключом."""
+        if namespace not in self._namespaces[topic]:
+            self._namespaces[topic].append(namespace)
+        self._topics[namespace] = topic
+
+    def _key(self, namespace: str, key: Any) -> str:
+        return f"{self.prefix}{namespace}:{key}"
+
+    def observe_versions(self, listener: VersionsListener) -> None:
+        """``listener({ключ счётчика: значение})`` получает новые значения счётчиков -- свои и других воркеров."""
+        self._versions_listeners.append(listener)
+
+    def topic_version_key(self, topic: str) -> str:
+        """Счётчик всех событий темы."""
+        return f"{self.prefix}version:{topic}"
+
+    def version_key(self, topic: str, key: Any = None) -> str:
+        """Счётчик событий темы по ключу; ``key=None`` -- счётчик событий без ключа (сброс всей темы)."""
+        return f"{self.prefix}version:{topic}:{'reset' if key is None else key}"
+
+    async def read_versions(self, *names: str) -> tuple[str, list[int]]:
+        """
+        Эпоха и значения счётчиков ``names``. Эпоха создаётся первым прочитавшим и
+        меняется, если бэкенд очистили (счётчики снова начались с нуля).
+        """
+        epoch, *values = await self.backend.get_many(self._epoch_key, *names)
+        if epoch is None:
+            epoch = await self.backend.set_default(self._epoch_key, uuid.uuid4().hex[:12].encode())
+        return epoch.decode(), [int(value or 0) for value in values]
+
+    @property
+    def _epoch_key(self) -> str:
+        return f"{self.prefix}version:epoch"
+
+    async def drain(self) -> None:
+        """Ждёт, пока события этого воркера дойдут до бэкенда."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def get(self, namespace: str, key: Any) -> tuple[Any, Optional[list[int]]]:
+        """
+        ``(значение, версия)``. Значение -- ``None``, если его нет, оно устарело, кэш не запущен
+        или бэкенд недоступен. Версию надо передать в ``set`` после загрузки из БД;
+        ``None`` -- кэшировать нельзя. У пространства без темы версия пустая.
+        """
+        if self._listener is None or self._key(namespace, key) in self._invalidating:
+            return None, None
+        topic = self._topics.get(namespace)
+        version_keys = [self.version_key(topic), self.version_key(topic, key)] if topic else []
+        try:
+            raw, *versions = await self.backend.get_many(self._key(namespace, key), *version_keys)
+            version = [int(value or 0) for value in versions]
+            if raw is None:
+                return None, version
+            entry = json.loads(raw)
+        except Exception as e:
+            logger.warning(f"Shared cache get failed: {e}")
+            return None, None
+        return (entry["value"] if entry["version"] == version else None), version
+
+    async def set(self, namespace: str, key: Any, value: Any, version: Optional[list[int]]) -> None:
+        # без слушателя не узнаем об изменениях -- не кэшируем
+        if self._listener is None or version is None or self._key(namespace, key) in self._invalidating:
+            return
+        try:
+            raw = json.dumps({"version": version, "value": value}, separators=(",", ":"), default=str).encode()
+            await self.backend.set(self._key(namespace, key), raw, self.ttl)
+        except Exception as e:
+            logger.warning(f"Shared cache set failed: {e}")
+
+    def forward(self, topic: str, key: Any) -> None:
+        """Слушатель ``change_feed``: удалить ключи темы и разослать событие другим воркерам."""
+        if self._listener is None:
+            return
+        keys = [] if key is None else [self._key(namespace, key) for namespace in self._namespaces.get(topic, ())]
+        self._invalidating.update(keys)
+        task = asyncio.get_running_loop().create_task(self._forward(topic, key, keys))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _forward(self, topic: str, key: Any, keys: list[str]) -> None:
+        try:
+            # сначала версия: записи, опоздавшие к удалению, при чтении окажутся устаревшими
+            names = [self.topic_version_key(topic), self.version_key(topic, key)]
+            versions = dict(zip(names, await self.backend.incr_many(*names)))
+            self._notify_versions(versions)
+            if keys:
+                await self.backend.delete(*keys)
+            message = {"origin": self._origin, "topic": topic, "key": None if key is None else str(key),
+                       "versions": versions}
+            await self.backend.publish(self.channel, json.dumps(message).encode())
+        except Exception as e:
+            logger.warning(f"Shared cache invalidation of '{topic}' failed: {e}")
+        finally:
+            self._invalidating.subtract(keys)
+            self._invalidating += Counter()  # убрать нули
+
+    def _on_message(self, raw: bytes) -> None:
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logger.warning("Malformed shared cache message skipped")
+            return
+        if message.get("origin") == self._origin:
+            return
+        self._notify_versions(message.get("versions") or {})
+        change_feed.dispatch(message["topic"], _restore_key(message.get("key")))
+
+    def _notify_versions(self, versions: dict[str, int]) -> None:
+        for listener in self._versions_listeners:
+            try:
+                listener(versions)
+            except Exception as e:
+                logger.error(f"Versions listener failed: {e}")
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+            logger.info(f"Shared cache started on {type(self.backend).__name__}")
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                await self.backend.listen(self.channel, self._on_message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Shared cache listener failed, reconnecting: {e}")
+                await asyncio.sleep(1.0)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, *self._pending, return_exceptions=True)
+            self._listener = None
+        await self.backend.close()
+
+
+def _backend():
+    if settings.cache.redis_url:
+        return RedisCacheBackend(settings.cache.redis_url, settings.cache.redis_timeout)
+    return InMemoryCacheBackend()
+
+
+shared_cache = SharedCache(_backend(), settings.cache.shared_ttl,
+                           settings.cache.redis_prefix, settings.cache.redis_channel)
@@ -0,0 +1,69 @@
+"""
+Версии данных для ETag, общие для всех воркеров.
+
+Счётчики живут в бэкенде ``shared_cache`` (Redis): на каждое событие ``change_feed``
+растёт версия темы и версия ключа (id сущности), событие без ключа увеличивает
+счётчик сбросов темы -- он входит в ETag каждой сущности. Воркер держит копию
+прочитанных счётчиков в ограниченном кэше и обновляет её результатами своих INCR
+и сообщениями других воркеров.
+
+В ETag входит эпоха из бэкенда: ETag одинаков на всех воркерах и после рестарта,
+а после очистки Redis (счётчики снова с нуля) меняется.
+"""
+import uuid
+from typing import Any, Optional
+
+from loguru import logger
+
+from infrastructure.shared_cache import shared_cache
+from settings.settings import settings
+from utils.ttl_cache import MISSING, TTLCache
+
+
+class ChangeVersions:
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.epoch: Optional[str] = None
+        self._versions = TTLCache(maxsize, ttl)  # ключ счётчика -> значение
+        shared_cache.observe_versions(self._observe)
+
+    def _observe(self, versions: dict[str, int]) -> None:
+        for name, value in versions.items():
+            current = self._versions.get(name)
+            # сообщения приходят не по порядку -- счётчик только растёт
+            if current is MISSING or current < value:
+                self._versions.set(name, value)
+
+    async def etag(self, topic: str, key: Any = None) -> str:
+        """Сильный ETag всей темы (``key=None``) или одной сущности."""
+        if key is None:
+            names = [shared_cache.topic_version_key(topic)]
+        else:
+            names = [shared_cache.version_key(topic), shared_cache.version_key(topic, key)]
+        try:
+            versions = await self._read(names)
+        except Exception as e:
+            logger.warning(f"Change versions unavailable: {e}")
+            # не совпадёт ни с одним If-None-Match -- ответ просто отдаётся целиком
+            return f'"{uuid.uuid4().hex}"'
+        if key is None:
+            return f'"{self.epoch}.{topic}.{versions[0]}"'
+        return f'"{self.epoch}.{topic}.{versions[0]}.{key}.{versions[1]}"'
+
+    async def _read(self, names: list[str]) -> list[int]:
+        # события этого воркера сначала доходят до бэкенда, иначе он сам отдал бы старый ETag
+        await shared_cache.drain()
+        versions = [self._versions.get(name) for name in names]
+        if self.epoch is not None and MISSING not in versions:
+            return versions
+        epoch, versions = await shared_cache.read_versions(*names)
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self._versions.clear()
+        self._observe(dict(zip(names, versions)))
+        return versions
+
+    def stats(self) -> dict[str, dict]:
+        return {"change_versions": self._versions.stats()}
+
+
+change_versions = ChangeVersions(settings.cache.version_max_size, settings.cache.version_ttl)
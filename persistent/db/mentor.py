@@ -1,5 +1,5 @@
 from persistent.db.base import Base, WithId
-from sqlalchemy import Column, String, Text
+from sqlalchemy import Column, LargeBinary, String, Text
 from sqlalchemy.orm import relationship
 
 
@@ -15,5 +15,6 @@ class Mentor(Base, WithId):
     experience_periods = Column(Text, nullable=True)
     hackathons = Column(Text, nullable=True)
     work = Column(Text, nullable=True)
+    availability_bitmap = Column(LargeBinary, nullable=True)  # 7x48 half-hour slots, see utils.availability_bitmap
     requests = relationship("Request", back_populates="mentor")
     time = relationship("MentorTime", back_populates="mentor")
\ No newline at end of file
@@ -1,14 +1,27 @@
 from persistent.db.base import Base, WithId
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, Boolean, Integer, Time, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, ExcludeConstraint
+from sqlalchemy import CheckConstraint, Column, Boolean, Integer, Time, ForeignKey, Index, func, literal_column
 from sqlalchemy.orm import relationship
 
 
 class MentorTime(Base, WithId):
     __tablename__ = "mentor_time"
+    __table_args__ = (
+        Index("ix_mentor_time_mentor_id_day", "mentor_id", "day"),
+        Index("ix_mentor_time_mentor_id_minutes", "mentor_id", "minute_start", "minute_end"),
+        # промежутки одного ментора не пересекаются и не соприкасаются (GiST, нужен btree_gist)
+        ExcludeConstraint(
+            ("mentor_id", "="),
+            (func.int4range(literal_column("minute_start"), literal_column("minute_end"), "[]"), "&&"),
+            name="ex_mentor_time_no_overlap", using="gist",
+        ).ddl_if(dialect="postgresql"),
+        CheckConstraint("time_start <= time_end", name="ck_mentor_time_start_before_end").ddl_if(dialect="postgresql"),
+    )
 
     day = Column(Integer, nullable=False)  # possible call day number (0 -- Monday, 1 -- Tuesday etc)
     time_start = Column(Time, nullable=False)
     time_end = Column(Time, nullable=False)
+    minute_start = Column(Integer, nullable=False)  # minute of week: day * 1440 + minutes of time_start
+    minute_end = Column(Integer, nullable=False)
     mentor_id = Column(UUID(as_uuid=True), ForeignKey("mentors.id"))
     mentor = relationship("Mentor", back_populates="time")
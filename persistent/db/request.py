@@ -1,12 +1,22 @@
 from persistent.db.base import Base, WithId
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import Column, Text, Boolean, DateTime, Integer, ForeignKey
+from sqlalchemy import Column, Text, Boolean, DateTime, Integer, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 
 class Request(Base, WithId):
     __tablename__ = "requests"
+    __table_args__ = (
+        Index("ix_requests_mentor_id_call_time", "mentor_id", "call_time"),
+        Index("ix_requests_guest_id", "guest_id"),
+        # неотвеченные запросы ментора: счётчик /count и список /get_requests
+        Index("ix_requests_pending_by_mentor", "mentor_id", "call_type",
+              postgresql_where=text("response = 0"), sqlite_where=text("response = 0")),
+        # одно время ментора -- не больше одного ожидающего или принятого звонка
+        Index("uq_requests_active_call_time", "mentor_id", "call_time", unique=True,
+              postgresql_where=text("response IN (0, 1)"), sqlite_where=text("response IN (0, 1)")),
+    )
 
     call_type = Column(Boolean, nullable=False) # 0 -- call, 1 -- question
     time_sended = Column(DateTime, default=datetime.now(), nullable=False)
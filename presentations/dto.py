@@ -0,0 +1,71 @@
+"""
+DTOs shared by all routers.
+
+List endpoints build them from repository rows (``MentorRow`` etc.) with ``from_rows``:
+the rows are already typed by the database, so the models are constructed without
+validation (``model_construct``) and serialized once by ``presentations.responses.render``.
+"""
+from datetime import datetime, time
+from typing import Iterable, List, Optional, Type, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+DtoT = TypeVar("DtoT", bound=BaseModel)
+
+
+class MentorDto(BaseModel):
+    id: UUID
+    telegram_id: str
+    name: str
+    info: str
+    specification: Optional[str] = None
+    role: Optional[str] = None
+    experience_periods: Optional[str] = None
+    hackathons: Optional[str] = None
+    work: Optional[str] = None
+
+
+class RequestDto(BaseModel):
+    id: UUID
+    call_type: bool
+    time_sended: datetime
+    mentor_id: UUID
+    guest_id: UUID
+    description: str
+    call_time: Optional[datetime]
+    response: int
+
+
+class MentorTimeDto(BaseModel):
+    id: UUID
+    day: int
+    time_start: time
+    time_end: time
+    mentor_id: UUID
+
+
+class FavoriteDto(BaseModel):
+    id: UUID
+    user_id: UUID
+    mentor_id: UUID
+
+
+def from_rows(dto_type: Type[DtoT], rows: Iterable) -> List[DtoT]:
+    """Build DTOs from NamedTuple rows without validation; row fields match the DTO fields."""
+    return [dto_type.model_construct(**row._asdict()) for row in rows]
+
+
+def build_mentor_dto(mentor) -> MentorDto:
+    """Convert a mentor (ORM instance or ``MentorRow``) to MentorDto including optional fields."""
+    return MentorDto(
+        id=mentor.id,
+        telegram_id=mentor.telegram_id,
+        name=mentor.name,
+        info=mentor.info,
+        specification=getattr(mentor, "specification", None),
+        role=mentor.role,
+        experience_periods=mentor.experience_periods,
+        hackathons=mentor.hackathons,
+        work=mentor.work,
+    )
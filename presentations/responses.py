@@ -0,0 +1,58 @@
+"""
+Response serialization.
+
+``render`` serializes a response model once with a compiled ``TypeAdapter`` (cached per
+type) and returns the bytes as is, skipping the second validation pass of ``response_model``.
+``Accept: application/msgpack`` (internal clients such as the Telegram bot) gets MessagePack
+when ``msgpack`` is installed. Other endpoints use ``DefaultResponse``: orjson when installed.
+"""
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+from utils.http_cache import set_cache_headers
+
+try:
+    import orjson  # noqa: F401 -- required by ORJSONResponse
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:  # pragma: no cover - orjson is optional
+    DefaultResponse = JSONResponse
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+VARY = "Accept"  # rendered responses depend on Accept; 304s for them must say so too
+
+
+def wants_msgpack(request: Request) -> bool:
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def representation_etag(request: Request, etag: str) -> str:
+    """ETag of the negotiated representation: MessagePack gets its own."""
+    return f'{etag[:-1]}-msgpack"' if wants_msgpack(request) else etag
+
+
+@lru_cache(maxsize=None)
+def _adapter(model_type: type) -> TypeAdapter:
+    return TypeAdapter(model_type)
+
+
+def render(request: Request, payload: BaseModel, status_code: int = 200, etag: Optional[str] = None) -> Response:
+    adapter = _adapter(type(payload))
+    if wants_msgpack(request):
+        body = msgpack.packb(adapter.dump_python(payload, mode="json"))
+        response = Response(body, status_code=status_code, media_type=MSGPACK_MEDIA_TYPE)
+    else:
+        response = Response(adapter.dump_json(payload), status_code=status_code, media_type=JSON_MEDIA_TYPE)
+    response.headers["Vary"] = VARY
+    if etag is not None:
+        set_cache_headers(response, etag)
+    return response
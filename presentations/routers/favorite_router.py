@@ -1,12 +1,16 @@
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel
 from loguru import logger
 
 from services.favorite_service import FavoriteMentorService
+from presentations.dto import FavoriteDto, from_rows
+from presentations.responses import render
+from infrastructure.db.unit_of_work import unit_of_work
 from utils.jwt_utils import extract_user_id
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 favorite_service = FavoriteMentorService()
 
@@ -14,17 +18,13 @@ favorite_router = APIRouter(
     prefix="/favorite",
     tags=["Favorite"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(unit_of_work)],
 )
 
 
-class FavoriteDto(BaseModel):
-    id: UUID
-    user_id: UUID
-    mentor_id: UUID
-
-
 class FavoriteListResponse(BaseModel):
     favorites: List[FavoriteDto]
+    next_cursor: Optional[str] = None
 
 
 class AddFavoriteResponse(BaseModel):
@@ -58,13 +58,19 @@ async def remove_favorite(mentor_id: UUID, user_id: UUID = Depends(extract_user_
 
 
 @favorite_router.get("/", response_model=FavoriteListResponse)
-async def get_favorites(user_id: UUID = Depends(extract_user_id)):
+async def get_favorites(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: UUID = Depends(extract_user_id),
+):
     try:
-        logger.info(f"User {user_id} gets favorite mentors")
-        favorites = await favorite_service.get_favorites(user_id)
-        return FavoriteListResponse(
-            favorites=[FavoriteDto(id=fav.id, user_id=fav.user_id, mentor_id=fav.mentor_id) for fav in favorites]
-        )
+        logger.info(f"User {user_id} gets favorite mentors page (limit={limit}, cursor={cursor})")
+        favorites_page = await favorite_service.get_favorites_page(user_id, limit, cursor)
+        return render(request, FavoriteListResponse.model_construct(
+            favorites=from_rows(FavoriteDto, favorites_page.items),
+            next_cursor=favorites_page.next_cursor,
+        ))
     except Exception as e:
         logger.error(f"Error fetching favorites: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,61 @@
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Depends
+from pydantic import BaseModel
+from loguru import logger
+
+from infrastructure.db.connection import engine_registry
+from infrastructure.versions import change_versions
+from repository.mentor_cache import mentor_cache
+from utils.jwt_utils import extract_user_id
+from utils.token_verifier import token_verifier
+
+health_router = APIRouter(
+    prefix="/health",
+    tags=["Health"],
+    responses={404: {"description": "Not Found"}},
+)
+
+
+class PoolStatsGetResponse(BaseModel):
+    pools: Dict[str, Dict[str, Any]]
+
+
+class CacheStatsGetResponse(BaseModel):
+    caches: Dict[str, Dict[str, Any]]
+
+
+@health_router.get("/pool", response_model=PoolStatsGetResponse)
+async def get_pool_stats(user_id: UUID = Depends(extract_user_id)):
+    """
+    Get live statistics of the database connection pools of this worker.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns size, checked in/out connections and overflow for every engine.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving connection pool stats")
+        return PoolStatsGetResponse(pools=engine_registry.pool_stats())
+    except Exception as e:
+        logger.error(f"Error retrieving pool stats: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@health_router.get("/cache", response_model=CacheStatsGetResponse)
+async def get_cache_stats(user_id: UUID = Depends(extract_user_id)):
+    """
+    Get statistics of the in-process caches of this worker.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns size, limits, hit and miss counters for every cache.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving cache stats")
+        return CacheStatsGetResponse(caches={**mentor_cache.stats(), **change_versions.stats(),
+                                             "verified_tokens": token_verifier.stats()})
+    except Exception as e:
+        logger.error(f"Error retrieving cache stats: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
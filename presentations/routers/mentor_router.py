@@ -1,13 +1,19 @@
-from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Query, Request, Response
 from pydantic import BaseModel
 from loguru import logger
 
 from services.mentor_service import MentorService
+from presentations.dto import MentorDto, MentorTimeDto, RequestDto, build_mentor_dto, from_rows
+from presentations.responses import render, representation_etag, VARY
+from infrastructure.db.unit_of_work import unit_of_work
+from infrastructure.events import MENTOR
+from infrastructure.versions import change_versions
+from utils.http_cache import CACHE_CONTROL, etag_matches, not_modified, set_cache_headers
 from utils.jwt_utils import extract_user_id
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 mentor_service = MentorService()
 
@@ -15,49 +21,32 @@ mentor_router = APIRouter(
     prefix="/mentor_service",
     tags=["Mentor"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(unit_of_work)],
 )
 
 
-class MentorDto(BaseModel):
-    id: UUID
-    telegram_id: str
-    name: str
-    info: str
-    specification: Optional[str] = None
-    role: Optional[str] = None
-    experience_periods: Optional[str] = None
-    hackathons: Optional[str] = None
-    work: Optional[str] = None
+class MentorGetAllResponse(BaseModel):
+    mentors: List[MentorDto]
+    next_cursor: Optional[str] = None
 
 
-def build_mentor_dto(mentor) -> MentorDto:
-    """Convert mentor ORM instance to MentorDto including optional fields."""
-    return MentorDto(
-        id=mentor.id,
-        telegram_id=mentor.telegram_id,
-        name=mentor.name,
-        info=mentor.info,
-        specification=getattr(mentor, "specification", None),
-        role=mentor.role,
-        experience_periods=mentor.experience_periods,
-        hackathons=mentor.hackathons,
-        work=mentor.work,
-    )
+class MentorSearchHitDto(MentorDto):
+    score: float
 
 
-class RequestDto(BaseModel):
-    id: UUID
-    call_type: bool
-    time_sended: datetime
-    mentor_id: UUID
-    guest_id: UUID
-    description: str
-    call_time: Optional[datetime]
-    response: int
+class MentorSearchGetResponse(BaseModel):
+    mentors: List[MentorSearchHitDto]
 
 
-class MentorGetAllResponse(BaseModel):
+class FacetValueDto(BaseModel):
+    value: str
+    count: int
+
+
+class MentorFacetsGetResponse(BaseModel):
     mentors: List[MentorDto]
+    total: int
+    facets: Dict[str, List[FacetValueDto]]
 
 
 class MentorCreatePostRequest(BaseModel):
@@ -114,20 +103,40 @@ class MentorRespondRequest(BaseModel):
     response: int  # 1 — принять, -1 — отклонить
 
 
+class RespondToRequestPatchResponse(BaseModel):
+    status: str
+    mentor_times: List[MentorTimeDto]
+
+
 @mentor_router.get("/", response_model=MentorGetAllResponse)
-async def get_all(user_id: UUID = Depends(extract_user_id)):
+async def get_all(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: UUID = Depends(extract_user_id),
+):
     """
-    Get all mentors.
+    Get all mentors, page by page.
+
+    - **limit**: page size, at most 200.
+    - **cursor**: `next_cursor` from the previous page; omit for the first page.
 
     Authorization header required with Bearer token containing user_id.
 
-    Returns all mentors' information.
+    Returns mentors' information and `next_cursor` (null on the last page).
+    Supports `If-None-Match`: returns 304 while no mentor has changed.
     """
     try:
-        logger.info(f"User {user_id} retrieving all mentors")
-        mentors = await mentor_service.get_all_mentors()
-        mentor_dtos = [build_mentor_dto(mentor) for mentor in mentors]
-        return MentorGetAllResponse(mentors=mentor_dtos)
+        etag = representation_etag(request, await change_versions.etag(MENTOR))
+        cached = not_modified(request, etag, vary=VARY)
+        if cached is not None:
+            return cached
+
+        logger.info(f"User {user_id} retrieving mentors page (limit={limit}, cursor={cursor})")
+        mentors_page = await mentor_service.get_mentors_page(limit, cursor)
+        payload = MentorGetAllResponse.model_construct(
+            mentors=from_rows(MentorDto, mentors_page.items), next_cursor=mentors_page.next_cursor)
+        return render(request, payload, etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -135,6 +144,34 @@ async def get_all(user_id: UUID = Depends(extract_user_id)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@mentor_router.get("/catalog", response_model=MentorGetAllResponse)
+async def get_catalog(request: Request, user_id: UUID = Depends(extract_user_id)):
+    """
+    Get all mentors at once, as a prebuilt snapshot.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns all mentors (`next_cursor` is always null). The body is served precompressed
+    according to `Accept-Encoding` (br if available, gzip) and supports `If-None-Match`.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving mentor catalog")
+        snapshot = await mentor_service.get_catalog_snapshot()
+        encoding, body, etag = snapshot.select(request.headers.get("accept-encoding"))
+
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving mentor catalog: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @mentor_router.post("/", response_model=CreateMentorPostResponse, status_code=201)
 async def create(mentor_request: MentorCreatePostRequest, user_id: UUID = Depends(extract_user_id)):
     """
@@ -162,7 +199,7 @@ async def create(mentor_request: MentorCreatePostRequest, user_id: UUID = Depend
 
 
 @mentor_router.get("/{mentor_id}", response_model=GetMentorByIdGetResponse)
-async def get_by_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
+async def get_by_id(request: Request, response: Response, mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
     """
     Get details of a mentor by their ID.
 
@@ -171,8 +208,14 @@ async def get_by_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
     Authorization header required with Bearer token containing user_id.
 
     Returns all mentor information.
+    Supports `If-None-Match`: returns 304 while the mentor has not changed.
     """
     try:
+        etag = await change_versions.etag(MENTOR, mentor_id)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+
         logger.info(f"User {user_id} retrieving mentor with ID {mentor_id}")
         mentor = await mentor_service.get_mentor_by_id(mentor_id)
         if not mentor:
@@ -180,6 +223,7 @@ async def get_by_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
             raise HTTPException(status_code=404, detail="Ментор не найден")
 
         mentor_dto = build_mentor_dto(mentor)
+        set_cache_headers(response, etag)
         return GetMentorByIdGetResponse(**mentor_dto.model_dump(exclude={"id"}))
     except HTTPException:
         raise
@@ -245,7 +289,7 @@ async def count_by_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id))
 
 
 @mentor_router.get("/get_requests/{mentor_id}", response_model=GetMentorRequestsByIdGetResponse)
-async def get_all_requests_by_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
+async def get_all_requests_by_id(request: Request, mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
     """
     Get all requests of a mentor by their ID.
 
@@ -259,21 +303,8 @@ async def get_all_requests_by_id(mentor_id: UUID, user_id: UUID = Depends(extrac
         logger.info(f"User {user_id} retrieving requests for mentor with ID {mentor_id}")
         requests = await mentor_service.get_requests(mentor_id)
 
-        return GetMentorRequestsByIdGetResponse(
-            requests=[
-                RequestDto(
-                    id=request.id,
-                    call_type=request.call_type,
-                    time_sended=request.time_sended,
-                    mentor_id=request.mentor_id,
-                    guest_id=request.guest_id,
-                    description=request.description,
-                    call_time=request.call_time,
-                    response=request.response,
-                )
-                for request in requests
-            ]
-        )
+        return render(request, GetMentorRequestsByIdGetResponse.model_construct(
+            requests=from_rows(RequestDto, requests)))
     except HTTPException:
         raise
     except Exception as e:
@@ -313,47 +344,175 @@ async def sync_mentor_external(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@mentor_router.get("/search/text", response_model=MentorSearchGetResponse)
+async def search_text(
+    request: Request,
+    q: str,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Ranked full-text search over mentor name, specification, role, info, about, hackathons and work.
+
+    - **q**: search words; on PostgreSQL web search syntax is supported (`"exact phrase"`, `-word`, `or`).
+    - **limit**: page size, at most 200.
+    - **offset**: number of hits to skip.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns mentors ordered by relevance with their `score`.
+    """
+    try:
+        logger.info(f"User {user_id} searching mentors: {q!r} (limit={limit}, offset={offset})")
+        hits = await mentor_service.search_mentors(q, limit, offset)
+        return render(request, MentorSearchGetResponse.model_construct(
+            mentors=[MentorSearchHitDto.model_construct(**mentor._asdict(), score=score) for mentor, score in hits]))
+    except Exception as e:
+        logger.error(f"Error searching mentors: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@mentor_router.get("/search/autocomplete", response_model=MentorGetAllResponse)
+async def search_autocomplete(
+    request: Request,
+    q: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Autocomplete for the mentor search box, served from memory.
+
+    - **q**: typed text; every word must be a prefix of a word in the mentor name or specification.
+    - **limit**: maximal number of suggestions.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns mentors ordered by name.
+    """
+    try:
+        mentors = await mentor_service.autocomplete_mentors(q, limit)
+        return render(request, MentorGetAllResponse.model_construct(mentors=from_rows(MentorDto, mentors)))
+    except Exception as e:
+        logger.error(f"Error autocompleting mentors: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@mentor_router.get("/search/fuzzy", response_model=MentorSearchGetResponse)
+async def search_fuzzy(
+    request: Request,
+    q: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Typo tolerant search over mentor name and specification, served from memory.
+
+    - **q**: search words.
+    - **limit**: maximal number of hits.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns mentors ordered by trigram similarity (`score`, 0..1).
+    """
+    try:
+        logger.info(f"User {user_id} fuzzy searching mentors: {q!r}")
+        hits = await mentor_service.fuzzy_search_mentors(q, limit)
+        return render(request, MentorSearchGetResponse.model_construct(
+            mentors=[MentorSearchHitDto.model_construct(**mentor._asdict(), score=score) for mentor, score in hits]))
+    except Exception as e:
+        logger.error(f"Error fuzzy searching mentors: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@mentor_router.get("/search/facets", response_model=MentorFacetsGetResponse)
+async def search_facets(
+    request: Request,
+    role: List[str] = Query([]),
+    specification: List[str] = Query([]),
+    hackathons: Optional[bool] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Filter mentors by several facets at once and get per-facet value counts.
+
+    - **role**, **specification**: exact values, repeat the parameter to select several (any of them matches).
+    - **hackathons**: true -- only mentors with hackathon experience, false -- only without.
+    - **limit**, **offset**: page of matching mentors (ordered by name).
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns the page of mentors, the total number of matches and, for every facet,
+    value counts computed with the other facets' filters applied.
+    """
+    try:
+        filters = {"role": role, "specification": specification}
+        if hackathons is not None:
+            filters["hackathons"] = ["yes" if hackathons else "no"]
+        logger.info(f"User {user_id} filtering mentors by facets {filters}")
+        result = await mentor_service.filter_mentors_by_facets(filters, limit, offset)
+
+        return render(request, MentorFacetsGetResponse.model_construct(
+            mentors=from_rows(MentorDto, result.mentors),
+            total=result.total,
+            facets={facet: [FacetValueDto.model_construct(value=value, count=count) for value, count in counts.items()]
+                    for facet, counts in result.counts.items()},
+        ))
+    except Exception as e:
+        logger.error(f"Error filtering mentors by facets: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @mentor_router.get("/search/by_name", response_model=MentorGetAllResponse)
-async def search_by_name(name: str, user_id: UUID = Depends(extract_user_id)):
+async def search_by_name(request: Request, name: str, user_id: UUID = Depends(extract_user_id)):
     """
     Поиск менторов по имени (частичное совпадение, регистронезависимо).
     """
     try:
         logger.info(f"User {user_id} searching mentors by name: {name}")
         mentors = await mentor_service.find_mentors_by_name(name)
-        mentor_dtos = [build_mentor_dto(mentor) for mentor in mentors]
-        return MentorGetAllResponse(mentors=mentor_dtos)
+        return render(request, MentorGetAllResponse.model_construct(mentors=from_rows(MentorDto, mentors)))
     except Exception as e:
         logger.error(f"Error searching mentors by name: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @mentor_router.get("/search/by_role", response_model=MentorGetAllResponse)
-async def search_by_role(role: str, user_id: UUID = Depends(extract_user_id)):
+async def search_by_role(request: Request, role: str, user_id: UUID = Depends(extract_user_id)):
     """
     Поиск менторов по роли (specification, частичное совпадение, регистронезависимо).
     """
     try:
         logger.info(f"User {user_id} searching mentors by role: {role}")
         mentors = await mentor_service.find_mentors_by_specification(role)
-        mentor_dtos = [build_mentor_dto(mentor) for mentor in mentors]
-        return MentorGetAllResponse(mentors=mentor_dtos)
+        return render(request, MentorGetAllResponse.model_construct(mentors=from_rows(MentorDto, mentors)))
     except Exception as e:
         logger.error(f"Error searching mentors by role: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@mentor_router.patch("/request/{request_id}/respond")
+@mentor_router.patch("/request/{request_id}/respond", response_model=RespondToRequestPatchResponse)
 async def respond_to_request(request_id: UUID, req: MentorRespondRequest, user_id: UUID = Depends(extract_user_id)):
     """
     Ментор принимает или отклоняет заявку (request). 1 — принять, -1 — отклонить.
     Если отклонено — ячейка времени освобождается, если принято — бронится.
+    Ответить можно только на ожидающую заявку, повторный ответ — 404.
+    Возвращает промежутки свободного времени, получившиеся после разбиения слота.
     Требуется авторизация (JWT).
     """
     try:
         logger.info(f"Mentor {user_id} responds to request {request_id} with response {req.response}")
-        await mentor_service.response_to_request(user_id, request_id, req.response)
-        return {"status": "ok"}
+        fragments = await mentor_service.response_to_request(user_id, request_id, req.response)
+        if fragments is None:
+            raise HTTPException(status_code=404, detail="Pending request not found")
+        return RespondToRequestPatchResponse(
+            status="ok",
+            mentor_times=from_rows(MentorTimeDto, fragments),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error responding to request: {e}")
         raise HTTPException(status_code=400, detail=str(e))
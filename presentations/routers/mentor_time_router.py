@@ -2,12 +2,19 @@ from datetime import datetime, time
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel
 from loguru import logger
 
 from services.mentor_time_service import MentorTimeService
+from presentations.dto import MentorDto, MentorTimeDto, from_rows
+from presentations.responses import render, representation_etag, VARY
+from infrastructure.db.unit_of_work import unit_of_work
+from infrastructure.events import MENTOR_TIME
+from infrastructure.versions import change_versions
+from utils.http_cache import not_modified
 from utils.jwt_utils import extract_user_id
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 mentor_time_service = MentorTimeService()
 
@@ -15,53 +22,34 @@ mentor_time_router = APIRouter(
     prefix="/mentor_time",
     tags=["MentorTime"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(unit_of_work)],
 )
 
 
-class MentorTimeDto(BaseModel):
-    id: UUID
+class MentorTimeGetAllResponse(BaseModel):
+    mentor_times: List[MentorTimeDto]
+    next_cursor: Optional[str] = None
+
+
+class CreateMentorTimeRequestPostRequest(BaseModel):
     day: int
     time_start: time
     time_end: time
     mentor_id: UUID
 
 
-class MentorDto(BaseModel):
-    id: UUID
-    telegram_id: str
-    name: str
-    info: str
-    specification: Optional[str] = None
-    role: Optional[str] = None
-    experience_periods: Optional[str] = None
-    hackathons: Optional[str] = None
-    work: Optional[str] = None
-
-
-class RequestDto(BaseModel):
+class CreateMentorTimeRequestGetResponse(BaseModel):
     id: UUID
-    call_type: bool
-    time_sended: datetime
-    mentor_id: UUID
-    guest_id: UUID
-    description: str
-    call_time: Optional[datetime]
-    response: int
 
 
-class MentorTimeGetAllResponse(BaseModel):
-    mentor_times: List[MentorTimeDto]
-
-
-class CreateMentorTimeRequestPostRequest(BaseModel):
+class ScheduleSlotDto(BaseModel):
     day: int
     time_start: time
     time_end: time
-    mentor_id: UUID
 
 
-class CreateMentorTimeRequestGetResponse(BaseModel):
-    id: UUID
+class ReplaceSchedulePutRequest(BaseModel):
+    slots: List[ScheduleSlotDto]
 
 
 class MentorTimeGetAllByMentorIdResponse(BaseModel):
@@ -72,6 +60,29 @@ class GetPossibleMentorTimeResponse(BaseModel):
     mentor_times: List[time]
 
 
+class FreeMentorsGetResponse(BaseModel):
+    mentors: List[MentorDto]
+
+
+class WeekSlotDto(BaseModel):
+    day: int
+    time: time
+
+
+class WeekSlotCoverageDto(BaseModel):
+    day: int
+    time: time
+    mentors: int
+
+
+class CommonSlotsGetResponse(BaseModel):
+    slots: List[WeekSlotDto]
+
+
+class SlotsBySpecificationGetResponse(BaseModel):
+    slots: List[WeekSlotCoverageDto]
+
+
 class CountMentorTimeGetRequest(BaseModel):
     count: int
 
@@ -81,26 +92,36 @@ class CheckMentorTimeGetRequest(BaseModel):
 
 
 @mentor_time_router.get("/", response_model=MentorTimeGetAllResponse)
-async def get_all(user_id: UUID = Depends(extract_user_id)):
+async def get_all(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: UUID = Depends(extract_user_id),
+):
     """
-    Get all mentor times.
+    Get all mentor times, page by page.
+
+    - **limit**: page size, at most 200.
+    - **cursor**: `next_cursor` from the previous page; omit for the first page.
 
     Authorization header required with Bearer token containing user_id.
 
-    Returns all mentor times' information.
+    Returns mentor times' information and `next_cursor` (null on the last page).
+    Supports `If-None-Match`: returns 304 while no mentor time has changed.
     """
     try:
-        logger.info(f"User {user_id} retrieving all mentor times")
-        mentor_times = await mentor_time_service.get_all_mentor_time()
-
-        return MentorTimeGetAllResponse(
-            mentor_times=[MentorTimeDto(id=mentor_time.id,
-                                 day=mentor_time.day,
-                                 time_start=mentor_time.time_start,
-                                 time_end=mentor_time.time_end,
-                                 mentor_id=mentor_time.mentor_id,)
-                     for mentor_time in mentor_times]
-        )
+        etag = representation_etag(request, await change_versions.etag(MENTOR_TIME))
+        cached = not_modified(request, etag, vary=VARY)
+        if cached is not None:
+            return cached
+
+        logger.info(f"User {user_id} retrieving mentor times page (limit={limit}, cursor={cursor})")
+        mentor_times_page = await mentor_time_service.get_mentor_time_page(limit, cursor)
+
+        return render(request, MentorTimeGetAllResponse.model_construct(
+            mentor_times=from_rows(MentorTimeDto, mentor_times_page.items),
+            next_cursor=mentor_times_page.next_cursor,
+        ), etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -136,8 +157,43 @@ async def create_mentor_time(mentor_time_request: CreateMentorTimeRequestPostReq
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@mentor_time_router.put("/mentor/{mentor_id}/schedule", response_model=MentorTimeGetAllByMentorIdResponse)
+async def replace_schedule(
+    mentor_id: UUID,
+    schedule_request: ReplaceSchedulePutRequest,
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Replace the whole weekly schedule of a mentor at once.
+
+    - **mentor_id**: Unique identifier of the mentor.
+    - **slots**: Free time intervals (`day`, `time_start`, `time_end`); overlapping ones are merged.
+      An empty list clears the schedule.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns the stored mentor times.
+    """
+    try:
+        logger.info(f"User {user_id} replacing schedule of mentor {mentor_id}")
+        mentor_times = await mentor_time_service.replace_schedule(
+            mentor_id, [(slot.day, slot.time_start, slot.time_end) for slot in schedule_request.slots])
+        if mentor_times is None:
+            raise HTTPException(status_code=404, detail="Mentor not found")
+
+        return MentorTimeGetAllByMentorIdResponse(
+            mentor_times=from_rows(MentorTimeDto, mentor_times)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error replacing mentor schedule: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @mentor_time_router.get("/mentor/{mentor_id}", response_model=MentorTimeGetAllByMentorIdResponse)
-async def get_all_by_mentor_id(mentor_id: UUID, user_id: UUID = Depends(extract_user_id)):
+async def get_all_by_mentor_id(request: Request, mentor_id: UUID,
+                               user_id: UUID = Depends(extract_user_id)):
     """
     Get all mentor times by mentor ID.
 
@@ -146,19 +202,19 @@ async def get_all_by_mentor_id(mentor_id: UUID, user_id: UUID = Depends(extract_
     Authorization header required with Bearer token containing user_id.
 
     Returns all mentor times' information by mentor ID.
+    Supports `If-None-Match`: returns 304 while the mentor's schedule has not changed.
     """
     try:
+        etag = representation_etag(request, await change_versions.etag(MENTOR_TIME, mentor_id))
+        cached = not_modified(request, etag, vary=VARY)
+        if cached is not None:
+            return cached
+
         logger.info(f"User {user_id} retrieving all mentor times for mentor {mentor_id}")
         mentor_times = await mentor_time_service.get_all_mentor_time_by_mentor_id(mentor_id)
 
-        return MentorTimeGetAllByMentorIdResponse(
-            mentor_times=[MentorTimeDto(id=mentor_time.id,
-                                 day=mentor_time.day,
-                                 time_start=mentor_time.time_start,
-                                 time_end=mentor_time.time_end,
-                                 mentor_id=mentor_time.mentor_id,)
-                     for mentor_time in mentor_times]
-        )
+        return render(request, MentorTimeGetAllByMentorIdResponse.model_construct(
+            mentor_times=from_rows(MentorTimeDto, mentor_times)), etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -167,7 +223,8 @@ async def get_all_by_mentor_id(mentor_id: UUID, user_id: UUID = Depends(extract_
 
 
 @mentor_time_router.get("/call_times/{mentor_id}/{day}", response_model=GetPossibleMentorTimeResponse)
-async def get_possible_time(mentor_id: UUID, day: int, user_id: UUID = Depends(extract_user_id)):
+async def get_possible_time(request: Request, mentor_id: UUID, day: int,
+                            user_id: UUID = Depends(extract_user_id)):
     """
     Get all possible time to call mentor during day.
 
@@ -178,14 +235,18 @@ async def get_possible_time(mentor_id: UUID, day: int, user_id: UUID = Depends(e
     Authorization header required with Bearer token containing user_id.
 
     Returns all mentor times' information by mentor ID and day.
+    Supports `If-None-Match`: returns 304 while the mentor's schedule has not changed.
     """
     try:
+        etag = representation_etag(request, await change_versions.etag(MENTOR_TIME, mentor_id))
+        cached = not_modified(request, etag, vary=VARY)
+        if cached is not None:
+            return cached
+
         logger.info(f"User {user_id} retrieving possible call times for mentor {mentor_id} on day {day}")
         mentor_times = await mentor_time_service.get_call_times(day=day, mentor_id=mentor_id)
 
-        return GetPossibleMentorTimeResponse(
-            mentor_times=mentor_times
-        )
+        return render(request, GetPossibleMentorTimeResponse.model_construct(mentor_times=mentor_times), etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -193,6 +254,97 @@ async def get_possible_time(mentor_id: UUID, day: int, user_id: UUID = Depends(e
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@mentor_time_router.get("/free", response_model=FreeMentorsGetResponse)
+async def get_free_mentors(
+    request: Request,
+    call_time: datetime,
+    exclude_reserved: bool = False,
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Get all mentors free at a given weekday and time.
+
+    - **call_time**: Datetime of call time in ISO format (e.g., 2023-10-03T10:00:00).
+      Only its weekday and time are used; minutes must be 00 or 30.
+    - **exclude_reserved**: also drop mentors that already have a pending or accepted
+      call request at exactly this datetime.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns mentors sorted by name.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving mentors free at {call_time}")
+        mentors = await mentor_time_service.get_free_mentors(call_time=call_time, exclude_reserved=exclude_reserved)
+
+        return render(request, FreeMentorsGetResponse.model_construct(mentors=from_rows(MentorDto, mentors)))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving free mentors: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@mentor_time_router.get("/common", response_model=CommonSlotsGetResponse)
+async def get_common_slots(
+    request: Request,
+    mentor_ids: List[UUID] = Query(..., min_length=1),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Get half-hour slots of the week when all given mentors are free, e.g. for a group session.
+
+    - **mentor_ids**: Mentor IDs, repeat the parameter for every mentor.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns slots ordered by day and time.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving common free slots for mentors {mentor_ids}")
+        slots = await mentor_time_service.get_common_free_slots(mentor_ids=mentor_ids)
+
+        return render(request, CommonSlotsGetResponse.model_construct(
+            slots=[WeekSlotDto.model_construct(day=day, time=slot_time) for day, slot_time in slots]))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving common free slots: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@mentor_time_router.get("/by_specification", response_model=SlotsBySpecificationGetResponse)
+async def get_slots_by_specification(
+    request: Request,
+    specification: str,
+    min_mentors: int = Query(1, ge=1),
+    user_id: UUID = Depends(extract_user_id),
+):
+    """
+    Get half-hour slots of the week when at least `min_mentors` mentors with the specification are free.
+
+    - **specification**: Part of the mentor specification, case insensitive.
+    - **min_mentors**: Minimal number of free mentors in a slot.
+
+    Authorization header required with Bearer token containing user_id.
+
+    Returns slots ordered by day and time with the number of free mentors.
+    """
+    try:
+        logger.info(f"User {user_id} retrieving slots with {min_mentors}+ free '{specification}' mentors")
+        slots = await mentor_time_service.get_slots_by_specification(
+            specification=specification, min_mentors=min_mentors)
+
+        return render(request, SlotsBySpecificationGetResponse.model_construct(
+            slots=[WeekSlotCoverageDto.model_construct(day=day, time=slot_time, mentors=count)
+                   for day, slot_time, count in slots]))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error retrieving slots by specification: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @mentor_time_router.get("/count/{mentor_id}/{request_time}", response_model=CountMentorTimeGetRequest)
 async def count_requests(mentor_id: UUID, request_time: datetime, user_id: UUID = Depends(extract_user_id)):
     """
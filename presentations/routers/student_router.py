@@ -2,12 +2,17 @@ from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
 from pydantic import BaseModel
 from loguru import logger
 
 from services.student_service import StudentService
+from presentations.dto import RequestDto, from_rows
+from presentations.responses import render
+from services.exceptions import CallTimeReservedError
+from infrastructure.db.unit_of_work import unit_of_work
 from utils.jwt_utils import extract_user_id
+from utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 student_service = StudentService()
 
@@ -15,34 +20,13 @@ student_router = APIRouter(
     prefix="/student",
     tags=["Student"],
     responses={404: {"description": "Not Found"}},
+    dependencies=[Depends(unit_of_work)],
 )
 
 
-class MentorDto(BaseModel):
-    id: UUID
-    telegram_id: str
-    name: str
-    info: str
-    specification: Optional[str] = None
-    role: Optional[str] = None
-    experience_periods: Optional[str] = None
-    hackathons: Optional[str] = None
-    work: Optional[str] = None
-
-
-class RequestDto(BaseModel):
-    id: UUID
-    call_type: bool
-    time_sended: datetime
-    mentor_id: UUID
-    guest_id: UUID
-    description: str
-    call_time: Optional[datetime]
-    response: int
-
-
 class RequestGetAllResponse(BaseModel):
     requests: List[RequestDto]
+    next_cursor: Optional[str] = None
 
 
 class SendMessageRequestPostRequest(BaseModel):
@@ -75,29 +59,30 @@ class GetRequestByIdGetResponse(BaseModel):
 
 
 @student_router.get("/", response_model=RequestGetAllResponse)
-async def get_all(user_id: UUID = Depends(extract_user_id)):
+async def get_all(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    user_id: UUID = Depends(extract_user_id),
+):
     """
-    Get all requests.
+    Get all requests, page by page.
+
+    - **limit**: page size, at most 200.
+    - **cursor**: `next_cursor` from the previous page; omit for the first page.
 
     Authorization header required with Bearer token containing user_id.
 
-    Returns all requests' information.
+    Returns requests' information and `next_cursor` (null on the last page).
     """
     try:
-        logger.info(f"User {user_id} retrieving all requests")
-        requests = await student_service.get_all_requests()
-
-        return RequestGetAllResponse(
-            requests=[RequestDto(id=request.id,
-                                 call_type=request.call_type,
-                                 time_sended=request.time_sended,
-                                 mentor_id=request.mentor_id,
-                                 guest_id=request.guest_id,
-                                 description=request.description,
-                                 call_time=request.call_time,
-                                 response=request.response,)
-                     for request in requests]
-        )
+        logger.info(f"User {user_id} retrieving requests page (limit={limit}, cursor={cursor})")
+        requests_page = await student_service.get_requests_page(limit, cursor)
+
+        return render(request, RequestGetAllResponse.model_construct(
+            requests=from_rows(RequestDto, requests_page.items),
+            next_cursor=requests_page.next_cursor,
+        ))
     except HTTPException:
         raise
     except Exception as e:
@@ -140,7 +125,7 @@ async def create_call(request_request: SendCallRequestPostRequest, user_id: UUID
 
     Authorization header required with Bearer token containing user_id.
 
-    Returns the created request.
+    Returns the created request, or 409 if the mentor already has a pending or accepted call at this time.
     """
     try:
         logger.info(f"Creating call request for user {user_id} to mentor {request_request.mentor_id}")
@@ -150,6 +135,9 @@ async def create_call(request_request: SendCallRequestPostRequest, user_id: UUID
         return SendCallRequestGetResponse(
             id=request_id,
         )
+    except CallTimeReservedError as e:
+        logger.warning(f"Call time conflict: {e}")
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating call request: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,5 +1,7 @@
 from infrastructure.db.connection import pg_connection
+from infrastructure.db.unit_of_work import session_scope
 from persistent.db.favorite_mentor import FavoriteMentor
+from repository.rows import FavoriteRow, FAVORITE_ROW_COLUMNS
 from sqlalchemy import insert, select, delete, UUID
 from typing import Optional, cast
 from sqlalchemy.sql import ColumnElement
@@ -14,10 +16,9 @@ class FavoriteMentorRepository:
             "user_id": user_id,
             "mentor_id": mentor_id,
         })
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             result = await session.execute(stmt)
             fav_id = result.inserted_primary_key[0]
-            await session.commit()
         return fav_id
 
     async def remove_favorite(self, user_id: UUID, mentor_id: UUID) -> None:
@@ -25,16 +26,27 @@ class FavoriteMentorRepository:
             cast(ColumnElement[bool], FavoriteMentor.user_id == user_id),
             cast(ColumnElement[bool], FavoriteMentor.mentor_id == mentor_id),
         )
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             await session.execute(stmt)
-            await session.commit()
 
     async def get_favorites(self, user_id: UUID) -> list[FavoriteMentor]:
         stmt = select(FavoriteMentor).where(
             cast(ColumnElement[bool], FavoriteMentor.user_id == user_id)
         )
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
             rows = resp.fetchall()
             favorites = [row[0] for row in rows]
             return favorites
+
+    async def get_favorites_page(self, user_id: UUID, limit: int,
+                                 after_id: Optional[UUID] = None) -> list[FavoriteRow]:
+        stmt = (select(*FAVORITE_ROW_COLUMNS)
+                .where(cast(ColumnElement[bool], FavoriteMentor.user_id == user_id))
+                .order_by(FavoriteMentor.id)
+                .limit(limit + 1))
+        if after_id is not None:
+            stmt = stmt.where(cast(ColumnElement[bool], FavoriteMentor.id > after_id))
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [FavoriteRow._make(row) for row in resp.all()]
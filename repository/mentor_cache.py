@@ -0,0 +1,133 @@
+"""
+Кэш чтения менторов по id и по telegram_id.
+
+Хранит неизменяемые ``MentorRow`` (не ORM-объекты, привязанные к сессии),
+помнит и отрицательный результат. ``MentorRepository`` сбрасывает кэш в каждом
+методе записи: сразу и ещё раз после коммита UnitOfWork, если запись внутри него.
+Внутри UnitOfWork с записями кэш не используется -- прочитанное может откатиться.
+
+Промах идёт во второй уровень -- ``shared_cache`` (общий для воркеров, события
+``MENTOR`` других воркеров сбрасывают и этот кэш), и только потом в БД.
+Профиль кладётся в ``shared_cache`` только при чтении по id: его версия читается
+до запроса в БД. Чтение по telegram_id кладёт лишь соответствие telegram_id -> id.
+"""
+from typing import Awaitable, Callable, Hashable, Optional
+from uuid import UUID
+
+from loguru import logger
+
+from infrastructure.db.unit_of_work import current_unit_of_work
+from infrastructure.events import change_feed, MENTOR
+from infrastructure.shared_cache import shared_cache
+from repository.rows import MentorRow
+from settings.settings import settings
+from utils.ttl_cache import MISSING, TTLCache
+
+Loader = Callable[[], Awaitable[Optional[MentorRow]]]
+SharedLoader = Callable[[], Awaitable[tuple[Optional[MentorRow], Optional[list[int]]]]]
+SharedStorer = Callable[[MentorRow, Optional[list[int]]], Awaitable[None]]
+
+# telegram_id -> id; профиль лежит в MENTOR_NAMESPACE, совпадение telegram_id проверяется при чтении
+MENTOR_NAMESPACE = "mentor"
+MENTOR_TG_NAMESPACE = "mentor_tg"
+
+
+class MentorCache:
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float) -> None:
+        self.negative_ttl = negative_ttl
+        self.by_id = TTLCache(maxsize, ttl)
+        self.by_telegram_id = TTLCache(maxsize, ttl)
+        self._generation = 0
+        shared_cache.register(MENTOR_NAMESPACE, MENTOR)
+        change_feed.subscribe(MENTOR, lambda mentor_id: self._drop(mentor_id, ()))
+
+    async def get_by_id(self, mentor_id: UUID, load: Loader) -> Optional[MentorRow]:
+        return await self._get(self.by_id, mentor_id, load,
+                               lambda: self._shared_by_id(mentor_id), self._store_shared)
+
+    async def get_by_telegram_id(self, telegram_id: str, load: Loader) -> Optional[MentorRow]:
+        return await self._get(self.by_telegram_id, telegram_id, load,
+                               lambda: self._shared_by_telegram_id(telegram_id), self._store_shared_telegram_id)
+
+    async def _get(self, cache: TTLCache, key: Hashable, load: Loader,
+                   load_shared: SharedLoader, store_shared: SharedStorer) -> Optional[MentorRow]:
+        unit_of_work = current_unit_of_work()
+        # в грязной транзакции читаем свои ещё не закоммиченные записи
+        if unit_of_work is not None and unit_of_work.has_writes:
+            return await load()
+
+        mentor = cache.get(key)
+        if mentor is not MISSING:
+            return mentor
+
+        generation = self._generation
+        mentor, version = await load_shared()
+        if mentor is None:
+            mentor = await load()
+            if mentor is not None and generation == self._generation:
+                await store_shared(mentor, version)
+        # Пока читали, ментора могли изменить
+        if generation == self._generation:
+            self._store(mentor, cache, key)
+        return mentor
+
+    @staticmethod
+    async def _shared_by_id(mentor_id: UUID) -> tuple[Optional[MentorRow], Optional[list[int]]]:
+        values, version = await shared_cache.get(MENTOR_NAMESPACE, mentor_id)
+        return (MentorRow(UUID(values[0]), *values[1:]) if values else None), version
+
+    async def _shared_by_telegram_id(self, telegram_id: str) -> tuple[Optional[MentorRow], Optional[list[int]]]:
+        mentor_id, version = await shared_cache.get(MENTOR_TG_NAMESPACE, telegram_id)
+        mentor = (await self._shared_by_id(UUID(mentor_id)))[0] if mentor_id else None
+        return (mentor if mentor is not None and mentor.telegram_id == telegram_id else None), version
+
+    @staticmethod
+    async def _store_shared(mentor: MentorRow, version: Optional[list[int]]) -> None:
+        await shared_cache.set(MENTOR_NAMESPACE, mentor.id, list(mentor), version)
+        await shared_cache.set(MENTOR_TG_NAMESPACE, mentor.telegram_id, str(mentor.id), [])
+
+    @staticmethod
+    async def _store_shared_telegram_id(mentor: MentorRow, version: Optional[list[int]]) -> None:
+        # версия профиля до загрузки неизвестна (id не знали) -- только соответствие, оно сверяется при чтении
+        await shared_cache.set(MENTOR_TG_NAMESPACE, mentor.telegram_id, str(mentor.id), version)
+
+    def _store(self, mentor: Optional[MentorRow], cache: TTLCache, key: Hashable) -> None:
+        if mentor is None:
+            cache.set(key, None, self.negative_ttl)
+            return
+        self.by_id.set(mentor.id, mentor)
+        self.by_telegram_id.set(mentor.telegram_id, mentor)
+
+    def invalidate(self, mentor_id: Optional[UUID], *telegram_ids: str) -> None:
+        """
+        Сбрасывает ментора ``mentor_id`` под обоими ключами и записи ``telegram_ids``
+        (в том числе отрицательные -- например, после создания ментора).
+        """
+        self._drop(mentor_id, telegram_ids)
+        unit_of_work = current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.after_commit(lambda: self._drop(mentor_id, telegram_ids))
+
+    def _drop(self, mentor_id: Optional[UUID], telegram_ids: tuple[str, ...]) -> None:
+        if mentor_id is None:
+            self.clear()
+            return
+        self._generation += 1
+        self.by_id.pop(mentor_id)
+        for telegram_id in telegram_ids:
+            self.by_telegram_id.pop(telegram_id)
+        # старый telegram_id ментора заранее неизвестен, а новый мог быть запомнен как отсутствующий
+        self.by_telegram_id.discard_where(lambda mentor: mentor is None or mentor.id == mentor_id)
+        logger.debug(f"Mentor cache invalidated for mentor {mentor_id}")
+
+    def clear(self) -> None:
+        self._generation += 1
+        self.by_id.clear()
+        self.by_telegram_id.clear()
+
+    def stats(self) -> dict[str, dict]:
+        return {"mentor_by_id": self.by_id.stats(), "mentor_by_telegram_id": self.by_telegram_id.stats()}
+
+
+mentor_cache = MentorCache(settings.cache.mentor_max_size, settings.cache.mentor_ttl,
+                           settings.cache.mentor_negative_ttl)
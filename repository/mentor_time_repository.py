@@ -1,14 +1,53 @@
 from infrastructure.db.connection import pg_connection
+from infrastructure.db.unit_of_work import session_scope
+from infrastructure.events import change_feed, MENTOR_TIME
+from persistent.db.mentor import Mentor
 from persistent.db.mentor_time import MentorTime
-from sqlalchemy import insert, select, UUID, update, delete
-from typing import cast, Optional
+from repository.rows import MentorTimeRow, MENTOR_TIME_ROW_COLUMNS
+from sqlalchemy import and_, func, insert, literal_column, select, UUID, update, delete
+from typing import cast, Iterable, Optional
 from datetime import time as Time
+import uuid
+from utils.availability_bitmap import bitmap_from_intervals, bitmap_to_bytes
+from utils.intervals import MINUTES_PER_DAY, minute_of_week, time_of_minute
+
+
+def _minute_range(minute_start, minute_end):
+    # то же выражение, что в ограничении ex_mentor_time_no_overlap, иначе GiST не подхватится
+    return func.int4range(minute_start, minute_end, literal_column("'[]'"))
+
+
+def _covers(session, minute_start: int, minute_end: int):
+    """Промежуток покрывает ``[minute_start, minute_end]``. На PostgreSQL -- ``@>`` по GiST, иначе btree."""
+    if session.get_bind().dialect.name == "postgresql":
+        return _minute_range(MentorTime.minute_start, MentorTime.minute_end).op("@>")(
+            _minute_range(minute_start, minute_end))
+    return and_(MentorTime.minute_start <= minute_start, MentorTime.minute_end >= minute_end)
+
+
+def _overlaps(session, minute_start: int, minute_end: int):
+    """Промежуток пересекается с ``[minute_start, minute_end]`` или касается его."""
+    if session.get_bind().dialect.name == "postgresql":
+        return _minute_range(MentorTime.minute_start, MentorTime.minute_end).op("&&")(
+            _minute_range(minute_start, minute_end))
+    return and_(MentorTime.minute_start <= minute_end, MentorTime.minute_end >= minute_start)
 
 
 class MentorTimeRepository:
     def __init__(self) -> None:
         self._sessionmaker = pg_connection()
 
+    @staticmethod
+    async def _store_availability_bitmap(session, mentor_id: Optional[UUID]) -> None:
+        """Пересчитывает ``mentors.availability_bitmap`` в той же транзакции, что и запись в mentor_time."""
+        if mentor_id is None:
+            return
+        resp = await session.execute(select(MentorTime.day, MentorTime.time_start, MentorTime.time_end)
+                                     .where(cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id)))
+        bitmap = bitmap_from_intervals(resp.all())
+        await session.execute(update(Mentor).where(cast("ColumnElement[bool]", Mentor.id == mentor_id))
+                              .values(availability_bitmap=bitmap_to_bytes(bitmap)))
+
     async def create_new_mentor_time(self,
                             day: int,
                             time_start: Time,
@@ -19,55 +58,185 @@ class MentorTimeRepository:
 
 
         stmp = insert(MentorTime).values({"day": day, "time_start": time_start,
-                                          "time_end": time_end, "mentor_id": mentor_id})
+                                          "time_end": time_end, "mentor_id": mentor_id,
+                                          "minute_start": minute_of_week(day, time_start),
+                                          "minute_end": minute_of_week(day, time_end)})
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             result = await session.execute(stmp)
             mentor_time_id = result.inserted_primary_key[0]
-            await session.commit()
+            await self._store_availability_bitmap(session, mentor_id)
 
+        change_feed.publish(MENTOR_TIME, mentor_id)
         return mentor_time_id
 
+    @staticmethod
+    async def _insert_many(session, mentor_id: UUID,
+                           intervals: Iterable[tuple[int, Time, Time]]) -> list[MentorTimeRow]:
+        rows = [MentorTimeRow(uuid.uuid4(), day, time_start, time_end, mentor_id)
+                for day, time_start, time_end in intervals]
+        if rows:
+            await session.execute(insert(MentorTime).values([
+                dict(row._asdict(), minute_start=minute_of_week(row.day, row.time_start),
+                     minute_end=minute_of_week(row.day, row.time_end))
+                for row in rows]))
+        return rows
+
+    async def replace_mentor_time(self,
+                                  mentor_id: UUID,
+                                  delete_ids: Iterable[UUID],
+                                  intervals: Iterable[tuple[int, Time, Time]]) -> list[MentorTimeRow]:
+        """
+        Удаляет промежутки ``delete_ids`` и добавляет ``intervals`` (тройки day, time_start, time_end)
+        одним многострочным INSERT в одной транзакции. Возвращает добавленные строки.
+        """
+        delete_ids = list(delete_ids)
+
+        async with session_scope(self._sessionmaker) as session:
+            if delete_ids:
+                await session.execute(delete(MentorTime).where(
+                    cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id), MentorTime.id.in_(delete_ids)))
+            rows = await self._insert_many(session, mentor_id, intervals)
+            await self._store_availability_bitmap(session, mentor_id)
+
+        change_feed.publish(MENTOR_TIME, mentor_id)
+        return rows
+
+    async def replace_schedule(self,
+                               mentor_id: UUID,
+                               intervals: Iterable[tuple[int, Time, Time]]) -> list[MentorTimeRow]:
+        """Заменяет всё расписание ментора на ``intervals`` в одной транзакции."""
+        async with session_scope(self._sessionmaker) as session:
+            await session.execute(delete(MentorTime).where(
+                cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id)))
+            rows = await self._insert_many(session, mentor_id, intervals)
+            await self._store_availability_bitmap(session, mentor_id)
+
+        change_feed.publish(MENTOR_TIME, mentor_id)
+        return rows
+
+    async def cut_mentor_time(self,
+                              mentor_id: UUID,
+                              day: int,
+                              minute_start: int,
+                              minute_end: int) -> Optional[list[MentorTimeRow]]:
+        """
+        Вырезает ``[minute_start, minute_end]`` (минуты дня ``day``) из промежутка, который его покрывает.
+
+        Строка ментора блокируется (``FOR UPDATE``), поэтому параллельные подтверждения
+        одного ментора разбивают расписание по очереди. Покрывающий промежуток ищется
+        и удаляется одним ``DELETE ... RETURNING``, остатки вставляются одним INSERT.
+        Границы сравниваются в минутах недели, остаток после выреза добавляется,
+        только если он начинается позже начала выреза.
+        Возвращает новые промежутки или ``None``, если покрывающего промежутка нет.
+        """
+        day_start = day * MINUTES_PER_DAY
+        cut_start, cut_end = day_start + minute_start, day_start + minute_end
+        async with session_scope(self._sessionmaker) as session:
+            covering_id = (select(MentorTime.id)
+                           .where(cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id),
+                                  _covers(session, cut_start, cut_end))
+                           .limit(1)
+                           .scalar_subquery())
+            stmp = (delete(MentorTime).where(cast("ColumnElement[bool]", MentorTime.id == covering_id))
+                    .returning(MentorTime.minute_start, MentorTime.minute_end)
+                    .execution_options(synchronize_session=False))
+
+            await session.execute(select(Mentor.id).where(
+                cast("ColumnElement[bool]", Mentor.id == mentor_id)).with_for_update())
+            resp = await session.execute(stmp)
+            covering = resp.first()
+            if covering is None:
+                return None
+
+            old_start, old_end = covering
+            fragments = []
+            if old_start < cut_start:
+                fragments.append((day, time_of_minute(old_start - day_start), time_of_minute(minute_start)))
+            if cut_start < cut_end < old_end:
+                fragments.append((day, time_of_minute(minute_end), time_of_minute(old_end - day_start)))
+            rows = await self._insert_many(session, mentor_id, fragments)
+            await self._store_availability_bitmap(session, mentor_id)
+
+        change_feed.publish(MENTOR_TIME, mentor_id)
+        return rows
+
     async def update_mentor_time(self, mentor_time_id: UUID,
                                  time_start: Time, time_end: Time) -> None:
         stmp = (update(MentorTime).where(cast("ColumnElement[bool]",MentorTime.id == mentor_time_id))
-                .values(time_start=time_start, time_end=time_end))
+                .values(time_start=time_start, time_end=time_end,
+                        minute_start=MentorTime.day * MINUTES_PER_DAY + minute_of_week(0, time_start),
+                        minute_end=MentorTime.day * MINUTES_PER_DAY + minute_of_week(0, time_end))
+                .returning(MentorTime.mentor_id))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmp)
+            mentor_id = resp.scalar()
+            await self._store_availability_bitmap(session, mentor_id)
 
-        async with self._sessionmaker() as session:
-            await session.execute(stmp)
-            await session.commit()
+        change_feed.publish(MENTOR_TIME, mentor_id)
 
     async def get_all_mentor_time(self) -> list[MentorTime]:
         stmt = select(MentorTime)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
 
             rows = resp.fetchall()
             mentor_time_list = [row[0] for row in rows]
             return mentor_time_list
 
-    async def get_all_mentor_time_by_mentor_id(self, mentor_id: UUID) -> Optional[list[MentorTime]]:
-        stmt = select(MentorTime).where(cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id))
+    async def get_all_mentor_time_rows(self) -> list[MentorTimeRow]:
+        stmt = select(*MENTOR_TIME_ROW_COLUMNS)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
+            return [MentorTimeRow._make(row) for row in resp.all()]
 
-            rows = resp.fetchall()
-            mentor_time_list = [row[0] for row in rows]
-            return mentor_time_list
+    async def get_mentor_time_page(self, limit: int, after_id: Optional[UUID] = None) -> list[MentorTimeRow]:
+        """Страница свободного времени по возрастанию id (keyset-пагинация), выбирает ``limit + 1`` строк."""
+        stmt = select(*MENTOR_TIME_ROW_COLUMNS).order_by(MentorTime.id).limit(limit + 1)
+        if after_id is not None:
+            stmt = stmt.where(cast("ColumnElement[bool]", MentorTime.id > after_id))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [MentorTimeRow._make(row) for row in resp.all()]
+
+    async def get_all_mentor_time_by_mentor_id(self, mentor_id: UUID) -> Optional[list[MentorTimeRow]]:
+        stmt = select(*MENTOR_TIME_ROW_COLUMNS).where(cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [MentorTimeRow._make(row) for row in resp.all()]
+
+    async def get_overlapping_mentor_time(self,
+                                          mentor_id: UUID,
+                                          day: int,
+                                          time_start: Time,
+                                          time_end: Time) -> list[MentorTimeRow]:
+        """Промежутки ментора, которые пересекаются с данным или касаются его."""
+        async with session_scope(self._sessionmaker) as session:
+            stmt = select(*MENTOR_TIME_ROW_COLUMNS).where(
+                cast("ColumnElement[bool]", MentorTime.mentor_id == mentor_id),
+                _overlaps(session, minute_of_week(day, time_start), minute_of_week(day, time_end)))
+            resp = await session.execute(stmt)
+            return [MentorTimeRow._make(row) for row in resp.all()]
 
     async def get_mentor_time_by_id(self, mentor_time_id: UUID) -> Optional[MentorTime]:
         stmp = select(MentorTime).where(cast("ColumnElement[bool]", MentorTime.id == mentor_time_id)).limit(1)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmp)
 
         row = resp.fetchone()
         return row[0] if row else None
 
     async def delete_mentor_time(self, mentor_time_id: UUID) -> None:
-        stmp = delete(MentorTime).where(MentorTime.id == mentor_time_id)
-        async with self._sessionmaker() as session:
-            await session.execute(stmp)
-            await session.commit()
\ No newline at end of file
+        stmp = delete(MentorTime).where(MentorTime.id == mentor_time_id).returning(MentorTime.mentor_id)
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmp)
+            mentor_id = resp.scalar()
+            await self._store_availability_bitmap(session, mentor_id)
+
+        change_feed.publish(MENTOR_TIME, mentor_id)
\ No newline at end of file
@@ -1,9 +1,25 @@
 from infrastructure.db.connection import pg_connection
+from infrastructure.db.unit_of_work import session_scope
+from infrastructure.events import change_feed, MENTOR
 from persistent.db.mentor import Mentor
-from sqlalchemy import insert, select, UUID, update, func
+from repository.mentor_cache import mentor_cache
+from repository.rows import MentorRow, MENTOR_ROW_COLUMNS
+from sqlalchemy import and_, case, insert, literal_column, or_, select, UUID, update, func
 from typing import cast, Optional
 
 
+# Веса полей как у setweight в миграции 0006: A=1.0, B=0.4, C=0.2, D=0.1 (умолчания ts_rank)
+SEARCH_FIELD_WEIGHTS = (
+    (Mentor.name, 1.0),
+    (Mentor.specification, 0.4),
+    (Mentor.role, 0.4),
+    (Mentor.info, 0.2),
+    (Mentor.about, 0.2),
+    (Mentor.hackathons, 0.1),
+    (Mentor.work, 0.1),
+)
+
+
 class MentorRepository:
     def __init__(self) -> None:
         self._sessionmaker = pg_connection()
@@ -22,41 +38,58 @@ class MentorRepository:
             "about": about,
             "specification": specification
         })
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             result = await session.execute(stmp)
             mentor_id = result.inserted_primary_key[0]
-            await session.commit()
+        mentor_cache.invalidate(mentor_id, tg_id)
+        change_feed.publish(MENTOR, mentor_id)
         return mentor_id
 
     async def get_all_mentors(self) -> list[Mentor]:
         stmt = select(Mentor)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
 
             rows = resp.fetchall()
             mentors = [row[0] for row in rows]
             return mentors
 
-    async def get_mentor_by_id(self, mentor_id: UUID) -> Optional[Mentor]:
-        stmp = select(Mentor).where(Mentor.id == mentor_id).limit(1)
-        async with self._sessionmaker() as session:
-            resp = await session.execute(stmp)
-        row = resp.fetchone()
-        return row[0] if row else None
+    async def get_mentors_page(self, limit: int, after_id: Optional[UUID] = None) -> list[MentorRow]:
+        """
+        Страница менторов по возрастанию id (keyset-пагинация), выбирает ``limit + 1`` строк.
+        """
+        stmt = select(*MENTOR_ROW_COLUMNS).order_by(Mentor.id).limit(limit + 1)
+        if after_id is not None:
+            stmt = stmt.where(Mentor.id > after_id)
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [MentorRow._make(row) for row in resp.all()]
 
-    async def get_mentor_by_tg_id(self, tg_id: str) -> Optional[Mentor]:
-        stmp = select(Mentor).where(Mentor.telegram_id == tg_id).limit(1)
-        async with self._sessionmaker() as session:
+    async def get_mentor_by_id(self, mentor_id: UUID) -> Optional[MentorRow]:
+        """Читает через ``mentor_cache``."""
+        return await mentor_cache.get_by_id(
+            mentor_id, lambda: self._get_mentor_row(cast("ColumnElement[bool]", Mentor.id == mentor_id)))
+
+    async def get_mentor_by_tg_id(self, tg_id: str) -> Optional[MentorRow]:
+        """Читает через ``mentor_cache``."""
+        return await mentor_cache.get_by_telegram_id(
+            tg_id, lambda: self._get_mentor_row(cast("ColumnElement[bool]", Mentor.telegram_id == tg_id)))
+
+    async def _get_mentor_row(self, condition) -> Optional[MentorRow]:
+        stmp = select(*MENTOR_ROW_COLUMNS).where(condition).limit(1)
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmp)
-        row = resp.fetchone()
-        return row[0] if row else None
+        row = resp.first()
+        return MentorRow._make(row) if row else None
 
     async def update_mentor_info(self, mentor_id: UUID, info: str) -> None:
         stmp = update(Mentor).where(Mentor.id == mentor_id).values(info=info)
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             await session.execute(stmp)
-            await session.commit()
+        mentor_cache.invalidate(mentor_id)
+        change_feed.publish(MENTOR, mentor_id)
 
     async def update_mentor_external_fields(
         self,
@@ -67,9 +100,10 @@ class MentorRepository:
         telegram_id: Optional[str],
     ) -> None:
         stmp = update(Mentor).where(Mentor.id == mentor_id).values(about=about, specification=specification, name=name, telegram_id=telegram_id)
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             await session.execute(stmp)
-            await session.commit()
+        mentor_cache.invalidate(mentor_id, telegram_id)
+        change_feed.publish(MENTOR, mentor_id)
 
     async def update_mentor_additional_fields(
         self,
@@ -97,28 +131,77 @@ class MentorRepository:
         if not values:
             return
         stmp = update(Mentor).where(Mentor.id == mentor_id).values(**values)
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             await session.execute(stmp)
-            await session.commit()
+        mentor_cache.invalidate(mentor_id)
+        change_feed.publish(MENTOR, mentor_id)
 
-    async def get_mentors_by_name(self, name: str) -> list[Mentor]:
+    async def get_mentors_by_name(self, name: str) -> list[MentorRow]:
         """
         Поиск менторов по имени (частичное совпадение, регистронезависимо).
         """
-        stmt = select(Mentor).where(func.lower(Mentor.name).like(f"%{name.lower()}%"))
-        async with self._sessionmaker() as session:
+        stmt = select(*MENTOR_ROW_COLUMNS).where(func.lower(Mentor.name).like(f"%{name.lower()}%"))
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
-            rows = resp.fetchall()
-            mentors = [row[0] for row in rows]
-            return mentors
+            return [MentorRow._make(row) for row in resp.all()]
 
-    async def get_mentors_by_specification(self, specification: str) -> list[Mentor]:
+    async def get_mentors_by_specification(self, specification: str) -> list[MentorRow]:
         """
         Поиск менторов по роли (specification, частичное совпадение, регистронезависимо).
         """
-        stmt = select(Mentor).where(func.lower(Mentor.specification).like(f"%{specification.lower()}%"))
-        async with self._sessionmaker() as session:
+        stmt = select(*MENTOR_ROW_COLUMNS).where(
+            func.lower(Mentor.specification).like(f"%{specification.lower()}%"))
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
-            rows = resp.fetchall()
-            mentors = [row[0] for row in rows]
-            return mentors
+            return [MentorRow._make(row) for row in resp.all()]
+
+    async def get_mentors_by_ids(self, mentor_ids) -> list[MentorRow]:
+        if not mentor_ids:
+            return []
+        stmt = select(*MENTOR_ROW_COLUMNS).where(Mentor.id.in_(mentor_ids)).order_by(Mentor.name)
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [MentorRow._make(row) for row in resp.all()]
+
+    async def get_availability_bitmaps(self) -> list[tuple[UUID, Optional[str], Optional[bytes]]]:
+        """``(id, specification, availability_bitmap)`` всех менторов."""
+        stmt = select(Mentor.id, Mentor.specification, Mentor.availability_bitmap)
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [tuple(row) for row in resp.all()]
+
+    async def search_mentors(self, query: str, limit: int, offset: int = 0) -> list[tuple[MentorRow, float]]:
+        """
+        Полнотекстовый поиск по профилю с ранжированием, лучшие совпадения первыми.
+
+        PostgreSQL: ``search_vector @@ websearch_to_tsquery`` по GIN-индексу, ранг ``ts_rank_cd``.
+        SQLite: каждое слово запроса должно встретиться хотя бы в одном поле (LIKE),
+        ранг -- сумма весов полей, где слово нашлось.
+        """
+        async with session_scope(self._sessionmaker) as session:
+            if session.get_bind().dialect.name == "postgresql":
+                search_vector = literal_column("search_vector")
+                ts_query = func.websearch_to_tsquery(literal_column("'simple'::regconfig"), query)
+                score = func.ts_rank_cd(search_vector, ts_query)
+                condition = search_vector.op("@@")(ts_query)
+            else:
+                terms = query.lower().split()
+                matches = [[(func.lower(func.coalesce(field, "")).contains(term, autoescape=True), weight)
+                            for field, weight in SEARCH_FIELD_WEIGHTS] for term in terms]
+                score = sum(case((match, weight), else_=0.0) for term_matches in matches
+                            for match, weight in term_matches)
+                condition = and_(*[or_(*[match for match, _ in term_matches]) for term_matches in matches])
+
+            stmt = (select(*MENTOR_ROW_COLUMNS, score.label("score"))
+                    .where(condition)
+                    .order_by(literal_column("score").desc(), Mentor.name)
+                    .limit(limit)
+                    .offset(offset))
+            resp = await session.execute(stmt)
+            return [(MentorRow._make(row[:-1]), float(row[-1])) for row in resp.all()]
+
+    async def get_all_mentor_rows(self) -> list[MentorRow]:
+        stmt = select(*MENTOR_ROW_COLUMNS).order_by(Mentor.name, Mentor.id)
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [MentorRow._make(row) for row in resp.all()]
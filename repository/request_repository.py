@@ -1,8 +1,11 @@
 from infrastructure.db.connection import pg_connection
+from infrastructure.db.unit_of_work import session_scope
+from infrastructure.events import change_feed, REQUEST
 from persistent.db.request import Request
-from sqlalchemy import insert, select, update, UUID
+from repository.rows import RequestRow, REQUEST_ROW_COLUMNS
+from sqlalchemy import insert, select, update, exists, func, text, UUID
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import datetime
-from persistent.db.request import Request
 from typing import cast, Optional
 
 
@@ -26,34 +29,104 @@ class RequestRepository:
             "description": description,
             "call_time": call_time})
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             result = await session.execute(stmt)
             request_id = result.inserted_primary_key[0]
-            await session.commit()
 
+        change_feed.publish(REQUEST, mentor_id)
+        return request_id
+
+    async def reserve_call(self,
+                           mentor_id: UUID,
+                           guest_id: UUID,
+                           description: str,
+                           call_time: datetime) -> Optional[UUID]:
+        """
+        Создаёт запрос на звонок, если у ментора на ``call_time`` нет ожидающего или принятого.
+
+        Занятость проверяет уникальный индекс ``uq_requests_active_call_time``:
+        один ``INSERT ... ON CONFLICT DO NOTHING RETURNING``, без предварительного чтения.
+        Возвращает id запроса или ``None``, если время уже занято.
+        """
+        values = {"call_type": 0, "mentor_id": mentor_id, "guest_id": guest_id,
+                  "description": description, "call_time": call_time}
+
+        async with session_scope(self._sessionmaker) as session:
+            dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+            stmt = (dialect.insert(Request).values(values)
+                    .on_conflict_do_nothing(index_elements=[Request.mentor_id, Request.call_time],
+                                            index_where=text("response IN (0, 1)"))
+                    .returning(Request.id))
+            resp = await session.execute(stmt)
+            request_id = resp.scalar()
+
+        if request_id is not None:
+            change_feed.publish(REQUEST, mentor_id)
         return request_id
 
     async def mentor_response(self, request_id: UUID, response: int) -> None:
-        stmp = update(Request).where(cast("ColumnElement[bool]", Request.id == request_id)).values(response=response)
+        stmp = (update(Request).where(cast("ColumnElement[bool]", Request.id == request_id)).values(response=response)
+                .returning(Request.mentor_id))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmp)
+            mentor_id = resp.scalar()
+
+        if mentor_id is not None:
+            change_feed.publish(REQUEST, mentor_id)
 
-        async with self._sessionmaker() as session:
-            await session.execute(stmp)
-            await session.commit()
+    async def change_response(self,
+                              request_id: UUID,
+                              mentor_id: UUID,
+                              response: int,
+                              expected_response: int) -> Optional[RequestRow]:
+        """
+        Меняет статус запроса ментора, только если текущий статус -- ``expected_response``.
+
+        Проверка и запись -- один ``UPDATE ... RETURNING``, из двух параллельных
+        ответов на один запрос применится только первый.
+        Возвращает обновлённую строку или ``None``, если условие не выполнено.
+        """
+        stmp = (update(Request)
+                .where(cast("ColumnElement[bool]", Request.id == request_id),
+                       cast("ColumnElement[bool]", Request.mentor_id == mentor_id),
+                       cast("ColumnElement[bool]", Request.response == expected_response))
+                .values(response=response)
+                .returning(*REQUEST_ROW_COLUMNS))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmp)
+            row = resp.first()
+
+        if row is None:
+            return None
+        change_feed.publish(REQUEST, mentor_id)
+        return RequestRow._make(row)
 
     async def get_all_requests(self) -> list[Request]:
         stmt = select(Request)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
 
             rows = resp.fetchall()
             requests = [row[0] for row in rows]
             return requests
 
+    async def get_requests_page(self, limit: int, after_id: Optional[UUID] = None) -> list[RequestRow]:
+        """Страница запросов по возрастанию id (keyset-пагинация), выбирает ``limit + 1`` строк."""
+        stmt = select(*REQUEST_ROW_COLUMNS).order_by(Request.id).limit(limit + 1)
+        if after_id is not None:
+            stmt = stmt.where(cast("ColumnElement[bool]", Request.id > after_id))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [RequestRow._make(row) for row in resp.all()]
+
     async def get_all_requests_by_mentor_id(self, mentor_id: UUID) -> Optional[list[Request]]:
         stmt = select(Request).where(cast("ColumnElement[bool]", Request.mentor_id == mentor_id))
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
 
             rows = resp.fetchall()
@@ -64,7 +137,7 @@ class RequestRepository:
         stmt = select(Request).where(cast("ColumnElement[bool]", Request.call_time == time),
                                      cast("ColumnElement[bool]", Request.mentor_id == mentor_id))
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
 
             rows = resp.fetchall()
@@ -74,7 +147,7 @@ class RequestRepository:
     async def get_request_by_id(self, request_id: UUID) -> Optional[Request]:
         stmp = select(Request).where(cast("ColumnElement[bool]", Request.id == request_id)).limit(1)
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmp)
 
         row = resp.fetchone()
@@ -83,22 +156,53 @@ class RequestRepository:
 
         return row[0]
 
+    async def get_requests_by_mentor_id_and_status(self, mentor_id: UUID, response: int) -> list[RequestRow]:
+        stmt = select(*REQUEST_ROW_COLUMNS).where(cast("ColumnElement[bool]", Request.mentor_id == mentor_id),
+                                                  cast("ColumnElement[bool]", Request.response == response))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return [RequestRow._make(row) for row in resp.all()]
+
+    async def count_requests_by_call_type(self, mentor_id: UUID, response: int = 0) -> dict[bool, int]:
+        """Количество запросов ментора с данным статусом, сгруппированное по ``call_type``."""
+        stmt = (select(Request.call_type, func.count())
+                .where(cast("ColumnElement[bool]", Request.mentor_id == mentor_id),
+                       cast("ColumnElement[bool]", Request.response == response))
+                .group_by(Request.call_type))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return {bool(call_type): count for call_type, count in resp.all()}
+
+    async def count_requests_by_time(self, mentor_id: UUID, time: datetime, response: int = 0) -> int:
+        stmt = select(func.count()).select_from(Request).where(
+            cast("ColumnElement[bool]", Request.call_time == time),
+            cast("ColumnElement[bool]", Request.mentor_id == mentor_id),
+            cast("ColumnElement[bool]", Request.response == response))
+
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return resp.scalar_one()
+
     async def check_time_reservation(self, mentor_id: UUID, time: datetime) -> bool:
         """Return True if there is a pending or accepted request at this time.
 
         Requests with status ``2`` (cancelled) do not count as a reservation.
         """
-        stmt = select(Request).where(cast("ColumnElement[bool]", Request.call_time == time),
-                                     cast("ColumnElement[bool]", Request.mentor_id == mentor_id))
+        stmt = select(exists().where(cast("ColumnElement[bool]", Request.call_time == time),
+                                     cast("ColumnElement[bool]", Request.mentor_id == mentor_id),
+                                     Request.response.in_((0, 1))))
 
-        async with self._sessionmaker() as session:
+        async with session_scope(self._sessionmaker) as session:
             resp = await session.execute(stmt)
+            return bool(resp.scalar())
 
-            rows = resp.fetchall()
-            requests = [row[0] for row in rows]
+    async def get_reserved_mentor_ids(self, time: datetime) -> set[UUID]:
+        """Менторы, у которых на ``time`` есть ожидающий или принятый запрос."""
+        stmt = select(Request.mentor_id).distinct().where(cast("ColumnElement[bool]", Request.call_time == time),
+                                                          Request.response.in_((0, 1)))
 
-            for request in requests:
-                if request.response in (0, 1):
-                    return True
-
-            return False
+        async with session_scope(self._sessionmaker) as session:
+            resp = await session.execute(stmt)
+            return set(resp.scalars().all())
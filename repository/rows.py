@@ -0,0 +1,72 @@
+"""
+Лёгкие строки для чтения списков.
+
+Репозитории выбирают только нужные колонки и упаковывают их в кортежи,
+без ORM-объектов, identity map и инструментирования атрибутов.
+Имена полей совпадают с атрибутами моделей, так что строки подходят везде,
+где модель только читается.
+"""
+from datetime import datetime, time
+from typing import NamedTuple, Optional
+from uuid import UUID
+
+from persistent.db.favorite_mentor import FavoriteMentor
+from persistent.db.mentor import Mentor
+from persistent.db.mentor_time import MentorTime
+from persistent.db.request import Request
+
+
+class MentorRow(NamedTuple):
+    id: UUID
+    telegram_id: str
+    name: str
+    info: str
+    specification: Optional[str]
+    role: Optional[str]
+    experience_periods: Optional[str]
+    hackathons: Optional[str]
+    work: Optional[str]
+
+
+MENTOR_ROW_COLUMNS = (Mentor.id, Mentor.telegram_id, Mentor.name, Mentor.info, Mentor.specification,
+                      Mentor.role, Mentor.experience_periods, Mentor.hackathons, Mentor.work)
+
+
+def mentor_row(mentor: Mentor) -> MentorRow:
+    return MentorRow._make(getattr(mentor, field) for field in MentorRow._fields)
+
+
+class RequestRow(NamedTuple):
+    id: UUID
+    call_type: bool
+    time_sended: datetime
+    mentor_id: UUID
+    guest_id: UUID
+    description: str
+    call_time: Optional[datetime]
+    response: int
+
+
+REQUEST_ROW_COLUMNS = (Request.id, Request.call_type, Request.time_sended, Request.mentor_id,
+                       Request.guest_id, Request.description, Request.call_time, Request.response)
+
+
+class MentorTimeRow(NamedTuple):
+    id: UUID
+    day: int
+    time_start: time
+    time_end: time
+    mentor_id: UUID
+
+
+MENTOR_TIME_ROW_COLUMNS = (MentorTime.id, MentorTime.day, MentorTime.time_start, MentorTime.time_end,
+                           MentorTime.mentor_id)
+
+
+class FavoriteRow(NamedTuple):
+    id: UUID
+    user_id: UUID
+    mentor_id: UUID
+
+
+FAVORITE_ROW_COLUMNS = (FavoriteMentor.id, FavoriteMentor.user_id, FavoriteMentor.mentor_id)
@@ -5,7 +5,6 @@ This is a temporary solution for testing the API without requiring Docker.
 import os
 import subprocess
 import sys
-import sqlite3
 import time
 from pathlib import Path
 
@@ -14,57 +13,20 @@ db_dir = Path("./sqlite_db")
 db_dir.mkdir(exist_ok=True)
 db_path = db_dir / "mentor_service.db"
 
-# Create SQLite tables based on PostgreSQL schema
+# Create SQLite tables by applying the same migrations as PostgreSQL
 def create_tables():
-    print("Creating SQLite database...")
-    conn = sqlite3.connect(str(db_path))
-    cursor = conn.cursor()
-    
-    # Create mentors table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS mentors (
-        id TEXT PRIMARY KEY,
-        telegram_id TEXT NOT NULL UNIQUE,
-        name TEXT NOT NULL,
-        info TEXT NOT NULL,
-        about TEXT,
-        specification TEXT,
-        role TEXT,
-        experience_periods TEXT,
-        hackathons TEXT,
-        work TEXT
-    )
-    ''')
-    
-    # Create mentor_time table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS mentor_time (
-        id TEXT PRIMARY KEY,
-        day INTEGER NOT NULL,
-        time_start TEXT NOT NULL,
-        time_end TEXT NOT NULL,
-        mentor_id TEXT,
-        FOREIGN KEY (mentor_id) REFERENCES mentors(id) ON DELETE CASCADE
-    )
-    ''')
-    
-    # Create requests table
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS requests (
-        id TEXT PRIMARY KEY,
-        call_type INTEGER NOT NULL,
-        time_sended TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-        mentor_id TEXT,
-        guest_id TEXT NOT NULL,
-        description TEXT NOT NULL,
-        call_time TIMESTAMP,
-        response INTEGER NOT NULL DEFAULT 0,
-        FOREIGN KEY (mentor_id) REFERENCES mentors(id) ON DELETE CASCADE
-    )
-    ''')
-    
-    conn.commit()
-    conn.close()
+    print("Applying migrations to SQLite database...")
+    import asyncio
+    from infrastructure.db.connection import engine_registry
+    from infrastructure.db.migrations import upgrade
+
+    async def _upgrade():
+        try:
+            await upgrade()
+        finally:
+            await engine_registry.dispose_all()
+
+    asyncio.run(_upgrade())
     print("SQLite database created successfully!")
 
 # Set environment variables for SQLite
@@ -84,12 +46,12 @@ def set_environment_vars():
     os.environ["APP_UVICORN__WORKERS"] = "1"
 
 def main():
+    # Set environment variables (migrations read the database URL from them)
+    set_environment_vars()
+
     # Setup SQLite database
     create_tables()
     
-    # Set environment variables
-    set_environment_vars()
-    
     print("Starting FastAPI application with SQLite...")
     print("You can access the API documentation at:")
     print("  http://localhost:8000/docs")
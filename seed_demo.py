@@ -0,0 +1,70 @@
+"""
+Seed demo data: the "@sup" mentor with a free 08:00-12:00 slot on the weekday of
+``DEMO_CALL_TIME`` (Wednesday), a message request and a call request for that time
+from a random student.
+
+Run it explicitly against the configured database (APP_DATABASE_URL / APP_PG__*):
+
+    python seed_demo.py
+
+The script is idempotent: if the mentor already exists nothing is created.
+With a shared cache (APP_CACHE__REDIS_URL) running workers are notified of the new rows.
+"""
+import argparse
+import asyncio
+from datetime import datetime, time
+from uuid import uuid4
+
+from loguru import logger
+
+from infrastructure.db.connection import engine_registry
+from infrastructure.db.migrations import ensure_schema_up_to_date
+from infrastructure.shared_cache import shared_cache
+from services.exceptions import CallTimeReservedError
+from services.mentor_service import MentorService
+from services.mentor_time_service import MentorTimeService
+from services.student_service import StudentService
+
+DEMO_CALL_TIME = datetime(2025, 1, 1, 10, 0)  # среда; окно ментора -- в тот же день недели
+DEMO_SLOT = (time(8, 0), time(12, 0))
+
+
+async def seed(telegram_id: str) -> None:
+    mentor_service = MentorService()
+    student_service = StudentService()
+    time_table_service = MentorTimeService()
+
+    mentor = await mentor_service.get_mentor_by_tg_id(telegram_id)
+    if mentor:
+        logger.info(f"Mentor {telegram_id} already exists ({mentor.id}), nothing to seed")
+        return
+
+    mentor_id = await mentor_service.create_mentor(telegram_id, "Super Idol", "super idol forever")
+    await time_table_service.create_mentor_time(DEMO_CALL_TIME.weekday(), *DEMO_SLOT, mentor_id)
+    logger.info(f"Mentor {telegram_id} created with ID: {mentor_id}")
+
+    user_id = uuid4()
+    try:
+        message_request_id = await student_service.send_message_request(mentor_id, user_id, "skibidi toilet")
+        logger.info(f"Message request created with ID: {message_request_id}")
+        call_request_id = await student_service.send_call_request(mentor_id, user_id, "sigma boy", DEMO_CALL_TIME)
+        logger.info(f"Call request created with ID: {call_request_id}")
+    except (ValueError, CallTimeReservedError) as e:
+        logger.error(f"Error creating request: {e}")
+
+
+async def main(telegram_id: str) -> None:
+    await ensure_schema_up_to_date()
+    await shared_cache.start()
+    try:
+        await seed(telegram_id)
+    finally:
+        await shared_cache.close()
+        await engine_registry.dispose_all()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed demo data for the mentor service")
+    parser.add_argument("--telegram-id", default="@sup", help="telegram id of the demo mentor")
+    args = parser.parse_args()
+    asyncio.run(main(args.telegram_id))
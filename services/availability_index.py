@@ -0,0 +1,184 @@
+"""
+In-memory индекс свободного времени менторов.
+
+Интервалы ``mentor_time`` хранятся как отсортированные и слитые отрезки
+в минутах от начала недели (0 -- понедельник 00:00). Поиск слотов дня и
+проверка "попадает ли время в свободное окно" -- бинарный поиск.
+Индекс ментора сбрасывается при любой записи в ``mentor_time``.
+Слитые отрезки ментора кладутся и в ``shared_cache`` (общий для воркеров).
+
+``FreeMentorsIndex`` -- обратный индекс: начало 30-минутного слота недели ->
+множество менторов, свободных в этот слот.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime, time as Time
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import UUID
+
+from infrastructure.events import change_feed, MENTOR_TIME
+from infrastructure.shared_cache import shared_cache
+from repository.mentor_time_repository import MentorTimeRepository
+from utils.intervals import MINUTES_PER_DAY, merge_intervals, minute_of_week, minute_of_week_from_datetime
+
+SLOT_MINUTES = 30
+CALL_TIMES_NAMESPACE = "call_times"
+
+
+class MentorAvailability:
+    """Свободное время одного ментора: непересекающиеся отрезки [start, end] по возрастанию."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self, intervals: Iterable[tuple[int, int]]) -> None:
+        merged = merge_intervals(intervals)
+        self.starts: list[int] = [start for start, _ in merged]
+        self.ends: list[int] = [end for _, end in merged]
+
+    @classmethod
+    def from_mentor_time(cls, mentor_time_list) -> "MentorAvailability":
+        return cls((minute_of_week(mentor_time.day, mentor_time.time_start),
+                    minute_of_week(mentor_time.day, mentor_time.time_end))
+                   for mentor_time in mentor_time_list)
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def contains(self, minute: int) -> bool:
+        """Границы включаются, как в ``utils_checkers.time_checker``."""
+        i = bisect_right(self.starts, minute) - 1
+        return i >= 0 and minute <= self.ends[i]
+
+    def contains_datetime(self, value: datetime) -> bool:
+        return self.contains(minute_of_week_from_datetime(value))
+
+    def slot_minutes_on_day(self, day: int) -> list[int]:
+        """Начала 30-минутных слотов дня (минуты от начала недели), попадающие в свободные окна."""
+        day_start = day * MINUTES_PER_DAY
+        day_end = day_start + MINUTES_PER_DAY
+        slots = []
+        i = bisect_left(self.ends, day_start)
+        while i < len(self.starts) and self.starts[i] < day_end:
+            first = -(-max(self.starts[i], day_start) // SLOT_MINUTES) * SLOT_MINUTES
+            last = min(self.ends[i], day_end - 1) // SLOT_MINUTES * SLOT_MINUTES
+            slots.extend(range(first, last + 1, SLOT_MINUTES))
+            i += 1
+        return slots
+
+    def slot_minutes(self) -> list[int]:
+        return [minute for day in range(7) for minute in self.slot_minutes_on_day(day)]
+
+    def slots_on_day(self, day: int) -> list[Time]:
+        day_start = day * MINUTES_PER_DAY
+        return [Time((minute - day_start) // 60, (minute - day_start) % 60)
+                for minute in self.slot_minutes_on_day(day)]
+
+
+class AvailabilityIndex:
+    """Индексы всех менторов процесса, загружаются лениво и сбрасываются по событиям ``mentor_time``."""
+
+    def __init__(self, mentor_time_repository: Optional[MentorTimeRepository] = None) -> None:
+        self.mentor_time_repository = mentor_time_repository or MentorTimeRepository()
+        self._by_mentor: dict[UUID, MentorAvailability] = {}
+        self._generation = 0
+        shared_cache.register(CALL_TIMES_NAMESPACE, MENTOR_TIME)
+        change_feed.subscribe(MENTOR_TIME, self.invalidate)
+
+    async def get(self, mentor_id: UUID) -> MentorAvailability:
+        availability = self._by_mentor.get(mentor_id)
+        if availability is not None:
+            return availability
+
+        generation = self._generation
+        intervals, version = await shared_cache.get(CALL_TIMES_NAMESPACE, mentor_id)
+        if intervals is not None:
+            availability = MentorAvailability(intervals)
+        else:
+            mentor_time_list = await self.mentor_time_repository.get_all_mentor_time_by_mentor_id(mentor_id)
+            availability = MentorAvailability.from_mentor_time(mentor_time_list or [])
+            if generation == self._generation:
+                await shared_cache.set(CALL_TIMES_NAMESPACE, mentor_id,
+                                       list(zip(availability.starts, availability.ends)), version)
+        # Если пока читали, пришла запись -- не кэшируем возможно устаревший снимок
+        if generation == self._generation:
+            self._by_mentor[mentor_id] = availability
+        return availability
+
+    def invalidate(self, mentor_id: Optional[UUID] = None) -> None:
+        self._generation += 1
+        if mentor_id is None:
+            self._by_mentor.clear()
+        else:
+            self._by_mentor.pop(mentor_id, None)
+        logger.debug(f"Availability index invalidated for mentor {mentor_id or 'all'}")
+
+
+class FreeMentorsIndex:
+    """
+    Слот недели -> менторы, свободные в этот слот.
+
+    Строится целиком при первом запросе, дальше при записи в ``mentor_time``
+    ментор помечается грязным и переиндексируется при следующем запросе.
+    """
+
+    def __init__(self, availability: AvailabilityIndex) -> None:
+        self.availability = availability
+        self._mentors_by_slot: dict[int, set[UUID]] = defaultdict(set)
+        self._slots_by_mentor: dict[UUID, list[int]] = {}
+        self._dirty: set[UUID] = set()
+        self._built = False
+        self._generation = 0
+        change_feed.subscribe(MENTOR_TIME, self.invalidate)
+
+    def invalidate(self, mentor_id: Optional[UUID] = None) -> None:
+        if mentor_id is None:
+            self._built = False
+            self._generation += 1
+        else:
+            self._dirty.add(mentor_id)
+
+    async def mentors_free_at(self, minute: int) -> set[UUID]:
+        await self._refresh()
+        return set(self._mentors_by_slot.get(minute, ()))
+
+    async def _refresh(self) -> None:
+        if not self._built:
+            self._dirty.clear()
+            generation = self._generation
+            await self._build()
+            self._built = generation == self._generation
+        while self._dirty:
+            mentor_id = self._dirty.pop()
+            availability = await self.availability.get(mentor_id)
+            self._reindex(mentor_id, availability.slot_minutes())
+
+    async def _build(self) -> None:
+        intervals_by_mentor = defaultdict(list)
+        for mentor_time in await self.availability.mentor_time_repository.get_all_mentor_time_rows():
+            intervals_by_mentor[mentor_time.mentor_id].append(mentor_time)
+
+        mentors_by_slot = defaultdict(set)
+        slots_by_mentor = {}
+        for mentor_id, mentor_time_list in intervals_by_mentor.items():
+            slots = MentorAvailability.from_mentor_time(mentor_time_list).slot_minutes()
+            slots_by_mentor[mentor_id] = slots
+            for minute in slots:
+                mentors_by_slot[minute].add(mentor_id)
+
+        self._mentors_by_slot = mentors_by_slot
+        self._slots_by_mentor = slots_by_mentor
+        logger.info(f"Free mentors index built for {len(slots_by_mentor)} mentors")
+
+    def _reindex(self, mentor_id: UUID, slots: list[int]) -> None:
+        for minute in self._slots_by_mentor.pop(mentor_id, ()):
+            self._mentors_by_slot[minute].discard(mentor_id)
+        if slots:
+            self._slots_by_mentor[mentor_id] = slots
+        for minute in slots:
+            self._mentors_by_slot[minute].add(mentor_id)
+
+
+availability_index = AvailabilityIndex()
+free_mentors_index = FreeMentorsIndex(availability_index)
@@ -0,0 +1,92 @@
+"""
+Недельные битовые карты всех менторов в одной матрице.
+
+Пересечение свободного времени группы менторов -- AND по строкам,
+"сколько менторов свободно в слот" -- сумма распакованных битов по столбцам.
+С NumPy это векторные операции над матрицей ``n x 42`` байт, без NumPy --
+те же операции над целыми числами Python.
+"""
+from functools import reduce
+from typing import Iterable, Optional
+
+from loguru import logger
+from sqlalchemy import UUID
+
+from infrastructure.events import change_feed, MENTOR, MENTOR_TIME
+from repository.mentors_repository import MentorRepository
+from utils.availability_bitmap import BITMAP_BYTES, SLOTS_PER_WEEK, bitmap_from_bytes, bitmap_slots
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy необязателен
+    np = None
+
+
+class AvailabilityMatrix:
+    def __init__(self, mentor_repository: Optional[MentorRepository] = None) -> None:
+        self.mentor_repository = mentor_repository or MentorRepository()
+        self._positions: dict[UUID, int] = {}
+        self._specifications: list[str] = []
+        self._bitmaps: list[int] = []
+        self._matrix = None
+        self._stale = True
+        self._generation = 0
+        change_feed.subscribe(MENTOR_TIME, self.invalidate)
+        change_feed.subscribe(MENTOR, self.invalidate)
+
+    def invalidate(self, _key=None) -> None:
+        self._stale = True
+        self._generation += 1
+
+    async def _refresh(self) -> None:
+        if not self._stale:
+            return
+        generation = self._generation
+        rows = await self.mentor_repository.get_availability_bitmaps()
+
+        self._positions = {mentor_id: position for position, (mentor_id, _, _) in enumerate(rows)}
+        self._specifications = [(specification or "").lower() for _, specification, _ in rows]
+        raw = [(bitmap or b"").ljust(BITMAP_BYTES, b"\0") for _, _, bitmap in rows]
+        if np is not None:
+            self._matrix = np.frombuffer(b"".join(raw), dtype=np.uint8).reshape(len(rows), BITMAP_BYTES)
+        else:
+            self._bitmaps = [bitmap_from_bytes(bitmap) for bitmap in raw]
+        self._stale = generation != self._generation
+        logger.info(f"Availability matrix loaded for {len(rows)} mentors")
+
+    async def common_slots(self, mentor_ids: Iterable[UUID]) -> list[int]:
+        """Слоты недели, в которые свободны все перечисленные менторы."""
+        await self._refresh()
+        positions = [self._positions.get(mentor_id) for mentor_id in mentor_ids]
+        if not positions or None in positions:
+            return []
+
+        if np is not None:
+            common = np.bitwise_and.reduce(self._matrix[positions], axis=0)
+            return bitmap_slots(int.from_bytes(common.tobytes(), "little"))
+        return bitmap_slots(reduce(lambda a, b: a & b, (self._bitmaps[position] for position in positions)))
+
+    async def slots_with_coverage(self, specification: str, min_mentors: int) -> list[tuple[int, int]]:
+        """
+        Слоты, в которые свободно не меньше ``min_mentors`` менторов, чья специализация
+        содержит ``specification`` (регистронезависимо). Возвращает пары ``(слот, число менторов)``.
+        """
+        await self._refresh()
+        needle = specification.lower()
+        positions = [position for position, value in enumerate(self._specifications) if needle in value]
+        if len(positions) < min_mentors:
+            return []
+
+        if np is not None:
+            bits = np.unpackbits(self._matrix[positions], axis=1, bitorder="little")
+            counts = bits.sum(axis=0, dtype=np.int32)
+            return [(int(slot), int(counts[slot])) for slot in np.flatnonzero(counts >= min_mentors)]
+
+        counts = [0] * SLOTS_PER_WEEK
+        for position in positions:
+            for slot in bitmap_slots(self._bitmaps[position]):
+                counts[slot] += 1
+        return [(slot, count) for slot, count in enumerate(counts) if count >= min_mentors]
+
+
+availability_matrix = AvailabilityMatrix()
@@ -0,0 +1,118 @@
+"""
+Готовый ответ каталога менторов: JSON-байты и их сжатые варианты.
+
+Каталог одинаков для всех пользователей, поэтому собирается один раз после
+изменения менторов (событие ``MENTOR`` только помечает снимок устаревшим),
+а запрос отдаёт уже сериализованные и сжатые байты без БД и Pydantic.
+Brotli -- если установлен пакет ``brotli``.
+"""
+import asyncio
+import gzip
+import json
+from dataclasses import dataclass, field
+from typing import Optional
+
+from loguru import logger
+
+from infrastructure.events import change_feed, MENTOR
+from infrastructure.versions import change_versions
+from repository.mentors_repository import MentorRepository
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+@dataclass
+class CatalogSnapshot:
+    etag: str  # ETag несжатого варианта, сжатые -- с суффиксом кодировки
+    bodies: dict[str, bytes] = field(default_factory=dict)  # кодировка ("identity", "gzip", "br") -> тело
+
+    def select(self, accept_encoding: Optional[str]) -> tuple[str, bytes, str]:
+        """
+        Лучший вариант для ``Accept-Encoding``: (кодировка, тело, ETag).
+        Выбирается наибольший q, при равном -- сжатый (br, затем gzip); q=0 запрещает кодировку.
+        """
+        qvalues = _qvalues(accept_encoding)
+        # не названные кодировки -- по "*", identity без "*" допустима, но уступает любой названной
+        any_q = qvalues.get("*", 0.0)
+        identity_q = qvalues.get("identity", qvalues.get("*", 0.001))
+        best, best_q = "identity", identity_q
+        for encoding in ("br", "gzip"):
+            q = qvalues.get(encoding, any_q)
+            if encoding in self.bodies and q > 0 and q >= best_q and (best == "identity" or q > best_q):
+                best, best_q = encoding, q
+        # identity;q=0 без подходящего сжатия -- всё равно identity, 406 не отдаём
+        if best == "identity":
+            return "identity", self.bodies["identity"], self.etag
+        return best, self.bodies[best], f'{self.etag[:-1]}-{best}"'
+
+
+def _qvalues(accept_encoding: Optional[str]) -> dict[str, float]:
+    """``Accept-Encoding`` -> {кодировка: q}; кодировка без q -- 1, некорректный q -- 0."""
+    qvalues: dict[str, float] = {}
+    for token in (accept_encoding or "").split(","):
+        coding, *params = token.split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = min(max(float(value), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        qvalues[coding] = max(q, qvalues.get(coding, 0.0))
+    return qvalues
+
+
+class CatalogSnapshotService:
+    def __init__(self, mentor_repository: Optional[MentorRepository] = None) -> None:
+        self.mentor_repository = mentor_repository or MentorRepository()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        change_feed.subscribe(MENTOR, self.invalidate)
+
+    def invalidate(self, _key=None) -> None:
+        self._snapshot = None
+        self._generation += 1
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        # параллельные запросы ждут одну сборку, а не собирают каждый свою
+        async with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            generation = self._generation
+            snapshot = await self._build()
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    async def _build(self) -> CatalogSnapshot:
+        # ETag до чтения: запись во время сборки даст новый ETag, а не старый с новыми данными
+        etag = await change_versions.etag(MENTOR)
+        mentors = await self.mentor_repository.get_all_mentor_rows()
+        body = json.dumps({"mentors": [mentor._asdict() for mentor in mentors], "next_cursor": None},
+                          default=str, ensure_ascii=False, separators=(",", ":")).encode()
+
+        # сжатие -- в потоке, чтобы большой каталог не держал event loop
+        snapshot = CatalogSnapshot(etag=etag, bodies={"identity": body})
+        snapshot.bodies["gzip"] = await asyncio.to_thread(gzip.compress, body, GZIP_LEVEL)
+        if brotli is not None:
+            snapshot.bodies["br"] = await asyncio.to_thread(brotli.compress, body, quality=BROTLI_QUALITY)
+        logger.info(f"Catalog snapshot built: {len(mentors)} mentors, "
+                    + ", ".join(f"{encoding} {len(data)} B" for encoding, data in snapshot.bodies.items()))
+        return snapshot
+
+
+catalog_snapshot = CatalogSnapshotService()
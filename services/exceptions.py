@@ -0,0 +1,2 @@
+class CallTimeReservedError(Exception):
+    """Время ментора уже занято ожидающим или принятым запросом на звонок."""
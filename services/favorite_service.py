@@ -5,6 +5,8 @@ from loguru import logger
 from persistent.db.favorite_mentor import FavoriteMentor
 from repository.favorite_mentor_repository import FavoriteMentorRepository
 from repository.mentors_repository import MentorRepository
+from repository.rows import FavoriteRow
+from utils.pagination import Page, build_page, clamp_page_size, decode_id_cursor
 
 
 class FavoriteMentorService:
@@ -32,3 +34,12 @@ class FavoriteMentorService:
         if not favorites:
             logger.warning(f"User {user_id} has no favorite mentors")
         return favorites
+
+    async def get_favorites_page(self, user_id: UUID, limit: int,
+                                 cursor: Optional[str] = None) -> Page[FavoriteRow]:
+        limit = clamp_page_size(limit)
+        after_id = decode_id_cursor(cursor)
+        favorites = await self.favorite_repository.get_favorites_page(user_id, limit, after_id)
+        if not favorites:
+            logger.warning(f"User {user_id} has no favorite mentors")
+        return build_page(favorites, limit, key=lambda favorite: (favorite.id,))
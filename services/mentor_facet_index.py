@@ -0,0 +1,115 @@
+"""
+Кэшируемый фасетный индекс менторов.
+
+Для каждого значения фасета хранится битовая маска менторов (int, бит = позиция
+в списке, отсортированном по имени). Фильтр -- AND по фасетам от OR выбранных
+значений, счётчики -- popcount. Счётчики фасета считаются без его собственного
+фильтра, чтобы в интерфейсе были видны альтернативы (disjunctive faceting).
+Индекс перестраивается целиком при следующем запросе после события ``MENTOR``.
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Optional
+
+from loguru import logger
+
+from infrastructure.events import change_feed, MENTOR
+from repository.mentors_repository import MentorRepository
+from repository.rows import MentorRow
+
+
+def _text_value(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return value or None
+
+
+def _participation(value: Optional[str]) -> str:
+    return "yes" if _text_value(value) else "no"
+
+
+# фасет -> значение фасета у ментора (None -- ментор в фасете не участвует)
+FACETS: dict[str, Callable[[MentorRow], Optional[str]]] = {
+    "role": lambda mentor: _text_value(mentor.role),
+    "specification": lambda mentor: _text_value(mentor.specification),
+    "hackathons": lambda mentor: _participation(mentor.hackathons),
+}
+
+
+@dataclass
+class FacetResult:
+    mentors: list[MentorRow] = field(default_factory=list)
+    total: int = 0
+    counts: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+class MentorFacetIndex:
+    def __init__(self, mentor_repository: Optional[MentorRepository] = None) -> None:
+        self.mentor_repository = mentor_repository or MentorRepository()
+        self._mentors: list[MentorRow] = []
+        self._masks: dict[str, dict[str, int]] = {}
+        self._stale = True
+        self._generation = 0
+        change_feed.subscribe(MENTOR, self.invalidate)
+
+    def invalidate(self, _key=None) -> None:
+        self._stale = True
+        self._generation += 1
+
+    async def _refresh(self) -> None:
+        if not self._stale:
+            return
+        generation = self._generation
+        mentors = await self.mentor_repository.get_all_mentor_rows()
+
+        masks: dict[str, dict[str, int]] = {facet: defaultdict(int) for facet in FACETS}
+        for position, mentor in enumerate(mentors):
+            for facet, value_of in FACETS.items():
+                value = value_of(mentor)
+                if value is not None:
+                    masks[facet][value] |= 1 << position
+
+        self._mentors = mentors
+        self._masks = {facet: dict(values) for facet, values in masks.items()}
+        self._stale = generation != self._generation
+        logger.info(f"Mentor facet index built for {len(mentors)} mentors")
+
+    def _facet_mask(self, facet: str, values: Iterable[str]) -> int:
+        mask = 0
+        for value in values:
+            mask |= self._masks[facet].get(value, 0)
+        return mask
+
+    async def search(self, filters: dict[str, list[str]], limit: int, offset: int = 0) -> FacetResult:
+        """``filters`` -- фасет -> выбранные значения; пустой список -- фасет не фильтруется."""
+        await self._refresh()
+        unknown = set(filters) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Неизвестные фасеты: {', '.join(sorted(unknown))}")
+
+        everyone = (1 << len(self._mentors)) - 1
+        facet_masks = {facet: self._facet_mask(facet, values) for facet, values in filters.items() if values}
+
+        def mask_without(excluded: Optional[str]) -> int:
+            mask = everyone
+            for facet, facet_mask in facet_masks.items():
+                if facet != excluded:
+                    mask &= facet_mask
+            return mask
+
+        counts = {}
+        for facet, values in self._masks.items():
+            base = mask_without(facet)
+            facet_counts = [(value, (base & value_mask).bit_count()) for value, value_mask in values.items()]
+            counts[facet] = dict(sorted(((value, count) for value, count in facet_counts if count),
+                                        key=lambda item: (-item[1], item[0])))
+
+        selected = mask_without(None)
+        positions = [position for position in range(len(self._mentors)) if selected >> position & 1]
+        return FacetResult(
+            mentors=[self._mentors[position] for position in positions[offset:offset + limit]],
+            total=len(positions),
+            counts=counts,
+        )
+
+
+mentor_facet_index = MentorFacetIndex()
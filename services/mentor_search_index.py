@@ -0,0 +1,169 @@
+"""
+In-memory поисковый индекс менторов для строки поиска.
+
+По словам из имени и специализации строятся:
+- отсортированный список слов -- автодополнение по префиксу бинарным поиском;
+- триграммный индекс слов -- нечёткий поиск с опечатками (сходство Жаккара
+  по множествам триграмм, как в pg_trgm).
+
+Индекс строится при старте приложения, изменённые менторы переиндексируются
+при следующем запросе после события ``MENTOR`` -- БД на каждое нажатие клавиши не нужна.
+"""
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import UUID
+
+from infrastructure.events import change_feed, MENTOR
+from repository.mentors_repository import MentorRepository
+from repository.rows import MentorRow, mentor_row
+
+_WORD_RE = re.compile(r"\w+")
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.25
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return _WORD_RE.findall(text.lower()) if text else []
+
+
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(left: set[str], right: set[str]) -> float:
+    shared = len(left & right)
+    return shared / (len(left) + len(right) - shared) if shared else 0.0
+
+
+class MentorSearchIndex:
+    def __init__(self, mentor_repository: Optional[MentorRepository] = None) -> None:
+        self.mentor_repository = mentor_repository or MentorRepository()
+        self._dirty: set[UUID] = set()
+        self._built = False
+        self._reset()
+        change_feed.subscribe(MENTOR, self.invalidate)
+
+    def _reset(self) -> None:
+        self._mentors: dict[UUID, MentorRow] = {}
+        self._mentor_words: dict[UUID, set[str]] = {}
+        self._word_mentors: dict[str, set[UUID]] = defaultdict(set)
+        self._word_trigrams: dict[str, set[str]] = {}
+        self._trigram_words: dict[str, set[str]] = defaultdict(set)
+        self._sorted_words: list[str] = []
+
+    def invalidate(self, mentor_id: Optional[UUID] = None) -> None:
+        if mentor_id is None:
+            self._built = False
+        else:
+            self._dirty.add(mentor_id)
+
+    async def build(self) -> None:
+        # события, пришедшие во время чтения, останутся в _dirty и применятся при следующем запросе
+        self._dirty.clear()
+        mentors = await self.mentor_repository.get_all_mentors()
+        self._reset()
+        for mentor in mentors:
+            self._index(mentor_row(mentor))
+        self._built = True
+        logger.info(f"Mentor search index built: {len(self._mentors)} mentors, {len(self._sorted_words)} words")
+
+    async def _refresh(self) -> None:
+        if not self._built:
+            await self.build()
+        while self._dirty:
+            mentor_id = self._dirty.pop()
+            mentor = await self.mentor_repository.get_mentor_by_id(mentor_id)
+            self._unindex(mentor_id)
+            if mentor is not None:
+                self._index(mentor)
+
+    def _index(self, mentor: MentorRow) -> None:
+        words = set(tokenize(mentor.name)) | set(tokenize(mentor.specification))
+        self._mentors[mentor.id] = mentor
+        self._mentor_words[mentor.id] = words
+        for word in words:
+            if word not in self._word_trigrams:
+                self._word_trigrams[word] = trigrams(word)
+                for trigram in self._word_trigrams[word]:
+                    self._trigram_words[trigram].add(word)
+                insort(self._sorted_words, word)
+            self._word_mentors[word].add(mentor.id)
+
+    def _unindex(self, mentor_id: UUID) -> None:
+        self._mentors.pop(mentor_id, None)
+        for word in self._mentor_words.pop(mentor_id, ()):
+            mentors = self._word_mentors[word]
+            mentors.discard(mentor_id)
+            if mentors:
+                continue
+            del self._word_mentors[word]
+            for trigram in self._word_trigrams.pop(word):
+                self._trigram_words[trigram].discard(word)
+            del self._sorted_words[bisect_left(self._sorted_words, word)]
+
+    def _mentors_with_prefix(self, prefix: str) -> set[UUID]:
+        mentor_ids = set()
+        i = bisect_left(self._sorted_words, prefix)
+        while i < len(self._sorted_words) and self._sorted_words[i].startswith(prefix):
+            mentor_ids |= self._word_mentors[self._sorted_words[i]]
+            i += 1
+        return mentor_ids
+
+    async def autocomplete(self, text: str, limit: int = 10) -> list[MentorRow]:
+        """Менторы, у которых каждое слово запроса -- начало какого-то слова имени или специализации."""
+        await self._refresh()
+        words = tokenize(text)
+        if not words:
+            return []
+
+        mentor_ids = self._mentors_with_prefix(words[0])
+        for word in words[1:]:
+            if not mentor_ids:
+                break
+            mentor_ids &= self._mentors_with_prefix(word)
+
+        mentors = sorted((self._mentors[mentor_id] for mentor_id in mentor_ids), key=lambda mentor: mentor.name)
+        return mentors[:limit]
+
+    async def fuzzy(self,
+                    text: str,
+                    limit: int = 10,
+                    threshold: float = DEFAULT_SIMILARITY_THRESHOLD) -> list[tuple[MentorRow, float]]:
+        """
+        Нечёткий поиск: для каждого слова запроса берётся самое похожее слово ментора,
+        итоговый балл -- среднее по словам запроса. Возвращает пары ``(ментор, балл)``.
+        """
+        await self._refresh()
+        words = tokenize(text)
+        if not words:
+            return []
+
+        scores: dict[UUID, float] = defaultdict(float)
+        for word in words:
+            word_trigrams = trigrams(word)
+            candidates = set()
+            for trigram in word_trigrams:
+                candidates |= self._trigram_words.get(trigram, set())
+
+            best: dict[UUID, float] = {}
+            for candidate in candidates:
+                score = similarity(word_trigrams, self._word_trigrams[candidate])
+                if score < threshold:
+                    continue
+                for mentor_id in self._word_mentors[candidate]:
+                    if score > best.get(mentor_id, 0.0):
+                        best[mentor_id] = score
+            for mentor_id, score in best.items():
+                scores[mentor_id] += score / len(words)
+
+        hits = [(self._mentors[mentor_id], score) for mentor_id, score in scores.items() if score >= threshold]
+        hits.sort(key=lambda hit: (-hit[1], hit[0].name))
+        return hits[:limit]
+
+
+mentor_search_index = MentorSearchIndex()
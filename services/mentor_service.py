@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict
 from typing import List, Optional
 from loguru import logger
@@ -8,9 +8,23 @@ import httpx
 from persistent.db.mentor import Mentor
 from persistent.db.request import Request
 from persistent.db.mentor_time import MentorTime
+from infrastructure.db.unit_of_work import UnitOfWork
+from infrastructure.events import REQUEST
+from infrastructure.shared_cache import shared_cache
 from repository.mentors_repository import MentorRepository
 from repository.request_repository import RequestRepository
+from repository.rows import MentorRow, MentorTimeRow, RequestRow
+from services.availability_index import SLOT_MINUTES
+from services.catalog_snapshot import CatalogSnapshot, catalog_snapshot
 from services.mentor_time_service import MentorTimeService
+from services.mentor_search_index import mentor_search_index
+from services.mentor_facet_index import FacetResult, mentor_facet_index
+from utils.intervals import call_minutes, time_of_minute
+from utils.pagination import Page, build_page, clamp_page_size, decode_id_cursor
+
+# Счётчики неотвеченных запросов ментора, сбрасываются событиями REQUEST
+REQUEST_COUNTS_NAMESPACE = "request_counts"
+shared_cache.register(REQUEST_COUNTS_NAMESPACE, REQUEST)
 
 
 class MentorService:
@@ -28,6 +42,22 @@ class MentorService:
             logger.warning("Менторы не найдены")
         return mentors
 
+
+    async def get_mentors_page(self, limit: int, cursor: Optional[str] = None) -> Page[MentorRow]:
+        """
+        Возвращает страницу менторов. ``cursor`` -- ``next_cursor`` предыдущей страницы.
+        """
+        limit = clamp_page_size(limit)
+        after_id = decode_id_cursor(cursor)
+        mentors = await self.mentor_repository.get_mentors_page(limit, after_id)
+        return build_page(mentors, limit, key=lambda mentor: (mentor.id,))
+
+    async def get_catalog_snapshot(self) -> CatalogSnapshot:
+        """
+        Возвращает готовый (сериализованный и сжатый) список всех менторов.
+        """
+        return await catalog_snapshot.get()
+
     async def create_mentor(
         self,
             tg_id: str,
@@ -45,7 +75,7 @@ class MentorService:
         logger.info(f"Товарищ {name} успешно посвящён в менторы.")
         return mentor_id
 
-    async def get_mentor_by_id(self, mentor_id: UUID) -> Optional[Mentor]:
+    async def get_mentor_by_id(self, mentor_id: UUID) -> Optional[MentorRow]:
         """
         Возвращает ментора по его ID.
         """
@@ -54,7 +84,7 @@ class MentorService:
             logger.warning(f"Товарища ментора с ID {mentor_id} не удалось найти.")
         return mentor
 
-    async def get_mentor_by_tg_id(self, tg_id: str) -> Optional[Mentor]:
+    async def get_mentor_by_tg_id(self, tg_id: str) -> Optional[MentorRow]:
         """
         Возвращает ментора по его tg.
         """
@@ -69,97 +99,86 @@ class MentorService:
 
         Возвращает словарь с ключами `call_requests` и `message_requests`.
         """
-        mentor_requests = await self.request_repository.get_all_requests_by_mentor_id(mentor_id)
+        # версия читается до запроса в БД: счётчики, посчитанные до чужой записи, не сохранятся
+        cached, version = await shared_cache.get(REQUEST_COUNTS_NAMESPACE, mentor_id)
+        if cached is not None:
+            return cached
 
-        call_requests = 0
-        message_requests = 0
-        for request in mentor_requests:
-            if request.response == 0:
-                if request.call_type == 0:
-                    call_requests += 1
-                else:
-                    message_requests += 1
+        counts = await self.request_repository.count_requests_by_call_type(mentor_id, response=0)
 
-        return {
-            "call_requests": call_requests,
-            "message_requests": message_requests,
+        # call_type: False -- звонок, True -- переписка
+        result = {
+            "call_requests": counts.get(False, 0),
+            "message_requests": counts.get(True, 0),
         }
+        await shared_cache.set(REQUEST_COUNTS_NAMESPACE, mentor_id, result, version)
+        return result
 
-    async def get_requests(self, mentor_id: UUID) -> List[Request]:
+    async def get_requests(self, mentor_id: UUID) -> List[RequestRow]:
         """
         Возвращает список неотвеченных запросов.
         """
-        mentor_requests = await self.request_repository.get_all_requests_by_mentor_id(mentor_id)
-        ignored_requests = []
-        for request in mentor_requests:
-            if request.response == 0:
-                ignored_requests.append(request)
-
-        return ignored_requests
+        return await self.request_repository.get_requests_by_mentor_id_and_status(mentor_id, response=0)
 
-    async def response_to_request(self, mentor_id: UUID, request_id: UUID, response: int) -> None:
+    async def response_to_request(self,
+                                  mentor_id: UUID,
+                                  request_id: UUID,
+                                  response: int) -> Optional[List[MentorTimeRow]]:
         """
-        Отмечает статус запроса. 1 -- принят, -1 -- отклонён
-        Если отклонено — слот времени освобождается (разбивается или удаляется).
+        Отмечает статус запроса. 1 -- принят, -1 -- отклонён.
+        Ответить можно только на ожидающий запрос (статус ``0``) своего ментора.
+        Если принят запрос на звонок -- его получасовой слот вырезается из свободного времени.
+
+        Возвращает новые промежутки свободного времени, получившиеся после разбиения
+        (пустой список, если разбивать нечего), или ``None``, если запрос не найден
+        или на него уже ответили.
         """
-        if not await self.mentor_repository.get_mentor_by_id(mentor_id):
-            logger.info(f"Ментора с id {mentor_id} не существует")
-            return
-        request = await self.request_repository.get_request_by_id(request_id)
-        if not request:
-            logger.info(f"Запроса №{request_id} не существует")
-            return
-        await self.request_repository.mentor_response(request_id=request_id, response=response)
-        if response == 1:
+        async with UnitOfWork():
+            request = await self.request_repository.change_response(
+                request_id=request_id, mentor_id=mentor_id, response=response, expected_response=0)
+            if not request:
+                logger.info(f"Запроса №{request_id} у ментора {mentor_id} нет или на него уже ответили")
+                return
+
+            if response != 1:
+                logger.info(f"Запрос №{request_id} отклонён")
+                return []
+
             logger.info(f"Запрос №{request_id} принят")
-            # Корректно очищаем слот времени, если заявка подтверждена
-            if request.call_time and request.mentor_id:
-                mentor_times = await self.mentor_time_service.get_all_mentor_time_by_mentor_id(request.mentor_id)
-                req_start = request.call_time.time()
-                req_end = (request.call_time + timedelta(minutes=30)).time()
-                for mt in mentor_times:
-                    if mt.time_start <= req_start and req_end <= mt.time_end and mt.day == request.call_time.isoweekday():
-                        # Если заявка занимает весь слот — просто удалить
-                        if mt.time_start == req_start and mt.time_end == req_end:
-                            await self.mentor_time_service.mentor_time_repository.delete_mentor_time(mt.id)
-                            logger.info(f"Слот времени {mt.id} полностью удалён после подтверждения заявки {request_id}")
-                        else:
-                            # Разбиваем слот на два, если заявка занимает середину
-                            old_start = mt.time_start
-                            old_end = mt.time_end
-                            await self.mentor_time_service.mentor_time_repository.delete_mentor_time(mt.id)
-                            if old_start < req_start:
-                                await self.mentor_time_service.mentor_time_repository.create_new_mentor_time(
-                                    mt.day, old_start, req_start, mt.mentor_id)
-                            if req_end < old_end:
-                                await self.mentor_time_service.mentor_time_repository.create_new_mentor_time(
-                                    mt.day, req_end, old_end, mt.mentor_id)
-                            logger.info(f"Слот времени {mt.id} разбит после подтверждения заявки {request_id}")
-                        break
-        else:
-            logger.info(f"Запрос №{request_id} отклонён")
+            if not request.call_time:
+                return []
+
+            minute_start, minute_end = call_minutes(request.call_time, SLOT_MINUTES)
+            fragments = await self.mentor_time_service.mentor_time_repository.cut_mentor_time(
+                mentor_id=request.mentor_id,
+                day=request.call_time.weekday(),
+                minute_start=minute_start,
+                minute_end=minute_end,
+            )
+            if fragments is None:
+                logger.warning(f"Для заявки {request_id} не найден промежуток свободного времени")
+                return []
+
+            logger.info(f"Слот времени разбит после подтверждения заявки {request_id}: {len(fragments)} промежутков")
+            return fragments
 
     async def cancel_request(self, mentor_id: UUID, request_id: UUID) -> None:
         """Отменить ранее подтверждённый запрос и вернуть слот времени."""
-        if not await self.mentor_repository.get_mentor_by_id(mentor_id):
-            logger.info(f"Ментора с id {mentor_id} не существует")
-            return
-        request = await self.request_repository.get_request_by_id(request_id)
-        if not request:
-            logger.info(f"Запроса №{request_id} не существует")
-            return
-        if request.response != 1:
-            logger.info(f"Запрос №{request_id} не находится в подтверждённом состоянии")
-            return
-        await self.request_repository.mentor_response(request_id=request_id, response=2)
-        if request.call_time and request.mentor_id:
-            await self.mentor_time_service.create_mentor_time(
-                request.call_time.isoweekday(),
-                request.call_time.time(),
-                (request.call_time + timedelta(minutes=30)).time(),
-                request.mentor_id,
-            )
-        logger.info(f"Запрос №{request_id} отменён и слот освобождён")
+        async with UnitOfWork():
+            request = await self.request_repository.change_response(
+                request_id=request_id, mentor_id=mentor_id, response=2, expected_response=1)
+            if not request:
+                logger.info(f"Запрос №{request_id} у ментора {mentor_id} не найден в подтверждённом состоянии")
+                return
+            if request.call_time:
+                minute_start, minute_end = call_minutes(request.call_time, SLOT_MINUTES)
+                await self.mentor_time_service.create_mentor_time(
+                    request.call_time.weekday(),
+                    time_of_minute(minute_start),
+                    time_of_minute(minute_end),
+                    request.mentor_id,
+                )
+            logger.info(f"Запрос №{request_id} отменён и слот освобождён")
 
     async def update_mentor_info(self, mentor_id: UUID, info: str) -> None:
         """
@@ -203,14 +222,45 @@ class MentorService:
         await self.mentor_repository.update_mentor_external_fields(mentor_id, about, specification, name, telegram)
         logger.info(f"Mentor {mentor_id} synced from external profile {external_user_id}")
 
-    async def find_mentors_by_name(self, name: str) -> List[Mentor]:
+    async def find_mentors_by_name(self, name: str) -> List[MentorRow]:
         """Поиск менторов по имени (частичное совпадение, регистронезависимо)."""
         mentors = await self.mentor_repository.get_mentors_by_name(name)
         if not mentors:
             logger.warning(f"Менторы с именем {name} не найдены")
         return mentors
 
-    async def find_mentors_by_specification(self, specification: str) -> List[Mentor]:
+    async def search_mentors(self, query: str, limit: int, offset: int = 0) -> List[tuple[MentorRow, float]]:
+        """
+        Ранжированный поиск по имени, специализации, роли, описанию, хакатонам и работе.
+        Возвращает пары ``(ментор, релевантность)``.
+        """
+        if not query.strip():
+            raise ValueError("Пустой поисковый запрос")
+        if offset < 0:
+            raise ValueError("offset должен быть неотрицательным")
+        return await self.mentor_repository.search_mentors(query.strip(), clamp_page_size(limit), offset)
+
+    async def autocomplete_mentors(self, text: str, limit: int = 10) -> List[MentorRow]:
+        """Подсказки для строки поиска: слова запроса -- префиксы слов имени или специализации."""
+        return await mentor_search_index.autocomplete(text, clamp_page_size(limit))
+
+    async def fuzzy_search_mentors(self, text: str, limit: int = 10) -> List[tuple[MentorRow, float]]:
+        """Поиск по имени и специализации с допуском опечаток. Возвращает пары ``(ментор, сходство)``."""
+        return await mentor_search_index.fuzzy(text, clamp_page_size(limit))
+
+    async def filter_mentors_by_facets(self,
+                                       filters: dict[str, List[str]],
+                                       limit: int,
+                                       offset: int = 0) -> FacetResult:
+        """
+        Фильтрует менторов по нескольким фасетам (role, specification, hackathons) и
+        возвращает страницу менторов, их общее число и счётчики значений каждого фасета.
+        """
+        if offset < 0:
+            raise ValueError("offset должен быть неотрицательным")
+        return await mentor_facet_index.search(filters, clamp_page_size(limit), offset)
+
+    async def find_mentors_by_specification(self, specification: str) -> List[MentorRow]:
         """Поиск менторов по роли (specification, частичное совпадение, регистронезависимо)."""
         mentors = await self.mentor_repository.get_mentors_by_specification(specification)
         if not mentors:
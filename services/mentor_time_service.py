@@ -1,4 +1,3 @@
-from datetime import datetime, timedelta
 from typing import List, Optional
 from loguru import logger
 from sqlalchemy import UUID
@@ -6,12 +5,19 @@ from sqlalchemy import UUID
 from persistent.db.mentor import Mentor
 from persistent.db.request import Request
 from persistent.db.mentor_time import MentorTime
+from infrastructure.db.unit_of_work import UnitOfWork
 from repository.mentors_repository import MentorRepository
 from repository.request_repository import RequestRepository
 from repository.mentor_time_repository import MentorTimeRepository
+from repository.rows import MentorRow, MentorTimeRow
+from services.availability_index import (availability_index, free_mentors_index,
+                                         minute_of_week_from_datetime, SLOT_MINUTES)
+from services.availability_matrix import availability_matrix
+from utils.availability_bitmap import slot_time
 from datetime import time as Time
 from datetime import datetime as DateTime
-from utils.utils_checkers import time_checker
+from utils.intervals import merge_intervals
+from utils.pagination import Page, build_page, clamp_page_size, decode_id_cursor
 
 class MentorTimeService:
     def __init__(self) -> None:
@@ -28,43 +34,72 @@ class MentorTimeService:
         Создаёт новый промежуток свободного времени.
 
         ``day`` должен быть в диапазоне от 0 до 6, где 0 -- понедельник.
+        Пересекающиеся с новым промежутки сливаются с ним в один. Возвращает id
+        промежутка, который содержит новый.
         """
         if not (0 <= day <= 6):
             logger.warning("Неверно указан день")
             return
 
-        if not await self.mentor_repository.get_mentor_by_id(mentor_id):
-            logger.info(f"Ментора с id {mentor_id} не существует")
+        if time_start > time_end:
+            logger.warning("Начало промежутка позже конца")
             return
 
-        mentor_time_list = await self.mentor_time_repository.get_all_mentor_time_by_mentor_id(mentor_id)
+        async with UnitOfWork():
+            if not await self.mentor_repository.get_mentor_by_id(mentor_id):
+                logger.info(f"Ментора с id {mentor_id} не существует")
+                return
 
-        flag_uuid = None
+            overlapping = await self.mentor_time_repository.get_overlapping_mentor_time(
+                mentor_id, day, time_start, time_end)
+            merged = merge_intervals([(mentor_time.time_start, mentor_time.time_end) for mentor_time in overlapping]
+                                     + [(time_start, time_end)])
 
-        for mentor_time in mentor_time_list:
-            if mentor_time.day == day:
-                if time_checker(day=day, time_start=time_start,
-                                time_end=time_end, call_time=mentor_time.time_start):
+            ids_by_interval = {(mentor_time.time_start, mentor_time.time_end): mentor_time.id
+                               for mentor_time in overlapping}
+            kept_ids = {ids_by_interval[interval] for interval in merged if interval in ids_by_interval}
+            delete_ids = [mentor_time.id for mentor_time in overlapping if mentor_time.id not in kept_ids]
+            new_intervals = [(day, start, end) for start, end in merged if (start, end) not in ids_by_interval]
 
-                    await self.mentor_time_repository.update_mentor_time(
-                        mentor_time_id=mentor_time.id,time_start=time_start, time_end=mentor_time.time_end)
-                    flag_uuid = mentor_time.id
+            if delete_ids or new_intervals:
+                created = await self.mentor_time_repository.replace_mentor_time(mentor_id, delete_ids, new_intervals)
+                ids_by_interval.update({(row.time_start, row.time_end): row.id for row in created})
 
-                if time_checker(day=day, time_start=time_start, time_end=time_end, call_time=mentor_time.time_end):
-                    await self.mentor_time_repository.update_mentor_time(
-                        mentor_time_id=mentor_time.id, time_start=mentor_time.time_start, time_end=time_end)
-                    flag_uuid = mentor_time.id
+            start, end = next((start, end) for start, end in merged if start <= time_start and time_end <= end)
 
-        if flag_uuid:
-            return flag_uuid
+            logger.info(f"Успешно добавлен промежуток свободного времени с"
+                        f" {start.strftime('%H:%M')} по {end.strftime('%H:%M')}")
+            return ids_by_interval[(start, end)]
 
-        mentor_time_id = await self.mentor_time_repository.create_new_mentor_time(
-            day=day, time_start=time_start, time_end=time_end, mentor_id=mentor_id
-        )
+    async def replace_schedule(self,
+                               mentor_id: UUID,
+                               slots: List[tuple[int, Time, Time]]) -> Optional[List[MentorTimeRow]]:
+        """
+        Заменяет всё недельное расписание ментора одной транзакцией.
 
-        logger.info(f"Успешно добавлен промежуток свободного времени с"
-                    f" {time_start.strftime('%H:%M')} по {time_end.strftime('%H:%M')}")
-        return mentor_time_id
+        ``slots`` -- тройки ``(day, time_start, time_end)``, пересечения сливаются.
+        """
+        for day, time_start, time_end in slots:
+            if not (0 <= day <= 6):
+                raise ValueError(f"Неверно указан день: {day}")
+            if time_start > time_end:
+                raise ValueError(f"Начало промежутка позже конца: {time_start} > {time_end}")
+
+        intervals = [(day, start, end)
+                     for day in range(7)
+                     for start, end in merge_intervals((time_start, time_end)
+                                                       for slot_day, time_start, time_end in slots
+                                                       if slot_day == day)]
+
+        async with UnitOfWork():
+            if not await self.mentor_repository.get_mentor_by_id(mentor_id):
+                logger.info(f"Ментора с id {mentor_id} не существует")
+                return
+
+            mentor_time_list = await self.mentor_time_repository.replace_schedule(mentor_id, intervals)
+
+        logger.info(f"Расписание ментора {mentor_id} заменено: {len(mentor_time_list)} промежутков")
+        return mentor_time_list
 
     async def get_all_mentor_time(self) -> List[MentorTime]:
         """
@@ -75,7 +110,17 @@ class MentorTimeService:
             logger.warning("Свободного времени не найдено")
         return mentor_time
 
-    async def get_all_mentor_time_by_mentor_id(self, mentor_id: UUID) -> Optional[List[MentorTime]]:
+
+    async def get_mentor_time_page(self, limit: int, cursor: Optional[str] = None) -> Page[MentorTimeRow]:
+        """
+        Возвращает страницу свободного времени. ``cursor`` -- ``next_cursor`` предыдущей страницы.
+        """
+        limit = clamp_page_size(limit)
+        after_id = decode_id_cursor(cursor)
+        mentor_time_list = await self.mentor_time_repository.get_mentor_time_page(limit, after_id)
+        return build_page(mentor_time_list, limit, key=lambda mentor_time: (mentor_time.id,))
+
+    async def get_all_mentor_time_by_mentor_id(self, mentor_id: UUID) -> Optional[List[MentorTimeRow]]:
         """
         Возвращает всё свободное время у конкретного ментора
         """
@@ -89,47 +134,53 @@ class MentorTimeService:
         """
         Возвращает список возможного времени для звонка.
         """
-        mentor_time_list = await self.mentor_time_repository.get_all_mentor_time_by_mentor_id(mentor_id)
-        day_time_gap_list = []
-        for mentor_time in mentor_time_list:
-            if day == mentor_time.day:
-                day_time_gap_list.append((mentor_time.time_start, mentor_time.time_end))
+        availability = await availability_index.get(mentor_id)
+        return availability.slots_on_day(day)
 
-        times_list = []
+    async def get_free_mentors(self, call_time: DateTime, exclude_reserved: bool = False) -> List[MentorRow]:
+        """
+        Возвращает менторов, свободных в ``call_time`` (день недели и время).
 
-        for time_start, time_end in day_time_gap_list:
-            start_datetime = datetime.combine(datetime.today(), time_start)
-            end_datetime = datetime.combine(datetime.today(), time_end)
+        ``call_time`` должно попадать на границу 30-минутного слота.
+        При ``exclude_reserved`` отбрасываются менторы, у которых на это время
+        уже есть ожидающий или принятый запрос.
+        """
+        if call_time.minute % SLOT_MINUTES or call_time.second or call_time.microsecond:
+            raise ValueError(f"Время звонка должно быть кратно {SLOT_MINUTES} минутам")
 
-            start_minutes = (start_datetime.minute // 30) * 30
-            if start_minutes < start_datetime.minute:
-                start_minutes += 30
-            start_datetime = start_datetime.replace(minute=start_minutes, second=0, microsecond=0)
+        mentor_ids = await free_mentors_index.mentors_free_at(minute_of_week_from_datetime(call_time))
+        if mentor_ids and exclude_reserved:
+            mentor_ids -= await self.request_repository.get_reserved_mentor_ids(time=call_time)
 
-            end_minutes = (end_datetime.minute // 30) * 30
-            if end_minutes > end_datetime.minute:
-                end_minutes -= 30
-            end_datetime = end_datetime.replace(minute=end_minutes, second=0, microsecond=0)
+        if not mentor_ids:
+            logger.info(f"Свободных менторов на {call_time.strftime('%H:%M %d/%m/%Y')} нет")
+            return []
+        return await self.mentor_repository.get_mentors_by_ids(mentor_ids)
 
-            current_time = start_datetime
-            while current_time <= end_datetime:
-                times_list.append(current_time.time())
-                current_time += timedelta(minutes=30)
+    async def get_common_free_slots(self, mentor_ids: List[UUID]) -> List[tuple[int, Time]]:
+        """
+        Возвращает слоты недели ``(день, время)``, в которые свободны все перечисленные менторы.
+        """
+        return [slot_time(slot) for slot in await availability_matrix.common_slots(set(mentor_ids))]
 
-        return times_list
+    async def get_slots_by_specification(self,
+                                         specification: str,
+                                         min_mentors: int) -> List[tuple[int, Time, int]]:
+        """
+        Возвращает слоты недели ``(день, время, число менторов)``, в которые свободно
+        не меньше ``min_mentors`` менторов с данной специализацией.
+        """
+        if min_mentors < 1:
+            raise ValueError("min_mentors должно быть не меньше 1")
+        slots = await availability_matrix.slots_with_coverage(specification, min_mentors)
+        return [(*slot_time(slot), count) for slot, count in slots]
 
     async def count_requests_for_time(self, mentor_id: UUID, request_time: DateTime) -> int:
         """
         Возвращает количество запросов на определённое время.
         """
-        mentor_requests = await self.request_repository.get_all_requests_by_time(time=request_time, mentor_id=mentor_id)
-
-        call_count = 0
-        for request in mentor_requests:
-            if request.response == 0:
-                call_count += 1
-
-        return call_count
+        return await self.request_repository.count_requests_by_time(
+            mentor_id=mentor_id, time=request_time, response=0)
 
     async def check_time_reservation(self, mentor_id: UUID, time: DateTime) -> bool:
         """
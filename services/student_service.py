@@ -5,11 +5,15 @@ from sqlalchemy import UUID
 
 from persistent.db.mentor import Mentor
 from persistent.db.request import Request
+from infrastructure.db.unit_of_work import UnitOfWork
 from repository.mentors_repository import MentorRepository
 from repository.request_repository import RequestRepository
 from repository.mentor_time_repository import MentorTimeRepository
+from repository.rows import RequestRow
 
-from utils.utils_checkers import time_checker
+from services.availability_index import availability_index
+from services.exceptions import CallTimeReservedError
+from utils.pagination import Page, build_page, clamp_page_size, decode_id_cursor
 
 class StudentService:
     # TODO: из внешней вебапы проверить на существование юзеров
@@ -27,6 +31,16 @@ class StudentService:
             logger.warning("Запросы не найдены")
         return requests
 
+
+    async def get_requests_page(self, limit: int, cursor: Optional[str] = None) -> Page[RequestRow]:
+        """
+        Возвращает страницу запросов. ``cursor`` -- ``next_cursor`` предыдущей страницы.
+        """
+        limit = clamp_page_size(limit)
+        after_id = decode_id_cursor(cursor)
+        requests = await self.request_repository.get_requests_page(limit, after_id)
+        return build_page(requests, limit, key=lambda request: (request.id,))
+
     async def send_message_request(
             self,
             mentor_id: UUID,
@@ -53,34 +67,28 @@ class StudentService:
             description: str,
             call_time: datetime) -> Optional[UUID]:
         """
-        Отправляет запрос на звонок
+        Отправляет запрос на звонок.
+
+        Свободное время ментора проверяется по in-memory индексу, занятость --
+        уникальным индексом в БД при вставке. Если время уже забронировано,
+        бросает ``CallTimeReservedError``.
         """
-        if not await self.mentor_repository.get_mentor_by_id(mentor_id):
-            logger.info(f"Ментора с id {mentor_id} не существует")
-            return
-        time_list = await self.mentor_time_repository.get_all_mentor_time_by_mentor_id(mentor_id=mentor_id)
+        availability = await availability_index.get(mentor_id)
 
-        if not time_list:
+        if not availability:
             logger.warning("У данного ментора нет свободного времени")
             return
 
-        for mentor_time in time_list:
-            if time_checker(day=mentor_time.day, time_start=mentor_time.time_start,
-                            time_end=mentor_time.time_end, call_datetime=call_time):
-                break
-        else:
+        if not availability.contains_datetime(call_time):
             logger.warning("Данное время у ментора занято")
             return
 
-        if await self.request_repository.check_time_reservation(
-                mentor_id=mentor_id, time=call_time):
-            logger.warning("Данное время у ментора забронировано")
-            return
+        request_id = await self.request_repository.reserve_call(
+            mentor_id=mentor_id, guest_id=guest_id, description=description, call_time=call_time)
 
-        request_id = await self.request_repository.create_request(
-            call_type=0, mentor_id=mentor_id, guest_id=guest_id,
-            description=description, call_time=call_time
-        )
+        if request_id is None:
+            logger.warning("Данное время у ментора забронировано")
+            raise CallTimeReservedError(f"Время {call_time.strftime('%H:%M %d/%m/%Y')} у ментора уже забронировано")
 
         logger.info(f"Запрос на созвон в {call_time.strftime('%H:%M %d/%m/%Y')} отправлен")
         return request_id
@@ -1,22 +1,37 @@
 import multiprocessing as mp
 
 from loguru import logger
-from pydantic import BaseModel
+from pydantic import BaseModel, SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import List
+from typing import List, Optional
 
 
 class Postgres(BaseModel):
+    host: str = "postgres"
     database: str = "db_main"
     port: int = 5433
     username: str = "db_main"
     password: str = "db_main"
+    pool_size: int = 5  # постоянные соединения в пуле одного процесса
+    max_overflow: int = 10  # сверх pool_size, открываются под пиковую нагрузку
+    pool_timeout: float = 30.0  # сколько ждать свободное соединение, сек
+    pool_recycle: int = 1800  # пересоздавать соединения старше N секунд, -1 -- никогда
+    pool_pre_ping: bool = True
+    null_pool: bool = False  # без пула (например, за pgbouncer)
+    # Общий бюджет соединений всех воркеров; пул воркера -- max_connections // (uvicorn.workers + 1),
+    # с запасом на воркер, который rolling reload поднимает до остановки старого (при одном воркере -- целиком)
+    max_connections: Optional[int] = None
+    echo: bool = False
 
 
 class Uvicorn(BaseModel):
     host: str = "localhost"
     port: int = 8000
     workers: int = 1
+    backlog: int = 2048
+    graceful_timeout: int = 30  # сек на завершение запросов при остановке воркера
+    startup_timeout: float = 60.0  # сек на запуск воркера при rolling reload
+    startup_budget: float = 5.0  # сек на прогрев в lifespan; дольше -- предупреждение в логе
 
 
 class CORS(BaseModel):
@@ -26,13 +41,48 @@ class CORS(BaseModel):
     allow_headers: List[str] = ["*"]
 
 
+class Cache(BaseModel):
+    mentor_max_size: int = 4096  # записей на каждый ключ (id и telegram_id), 0 -- без кэша
+    mentor_ttl: float = 60.0  # сек
+    mentor_negative_ttl: float = 5.0  # сколько помнить "ментор не найден", сек
+    # Общий кэш воркеров; без redis_url -- в памяти процесса
+    redis_url: Optional[str] = None  # например, redis://redis:6379/0
+    redis_prefix: str = "mentor_service:"
+    redis_channel: str = "mentor_service:invalidate"
+    redis_timeout: float = 0.5  # сек на подключение и операцию; дольше -- кэш пропускается
+    shared_ttl: float = 300.0  # сек
+    # Копия счётчиков версий (ETag) в воркере; TTL страхует от потерянного сообщения pub/sub
+    version_max_size: int = 65536
+    version_ttl: float = 5.0  # сек
+
+
+class Auth(BaseModel):
+    # Проверка подписи JWT включается, если задан хотя бы один источник ключей
+    jwt_secret: Optional[SecretStr] = None  # HS*-ключ, в логах скрыт
+    jwks_file: Optional[str] = None  # JSON {"keys": [...]}, перечитывается при изменении
+    jwks_url: Optional[str] = None  # например, http://auth/.well-known/jwks.json
+    algorithms: List[str] = ["HS256", "RS256", "ES256"]
+    audience: Optional[str] = None
+    issuer: Optional[str] = None
+    leeway: float = 0.0  # допуск по exp/nbf, сек
+    require_exp: bool = True  # токен без exp отклоняется
+    token_cache_size: int = 10000
+    token_cache_ttl: float = 300.0  # сек, не дольше exp токена
+    jwks_refresh_interval: float = 300.0  # сек между перечитываниями JWKS
+    jwks_min_refresh_interval: float = 30.0  # сек, не чаще -- при неизвестном kid
+
+
 class _Settings(BaseSettings):
     pg: Postgres = Postgres()
     uvicorn: Uvicorn = Uvicorn()
     cors: CORS = CORS()
+    cache: Cache = Cache()
+    auth: Auth = Auth()
+    # Полный URL БД, перекрывает pg (например, sqlite:///./sqlite_db/mentor_service.db)
+    database_url: Optional[str] = None
 
     model_config = SettingsConfigDict(env_prefix="app_", env_nested_delimiter="__")
 
 
 settings = _Settings()
-logger.info("settings.inited {}", settings.model_dump_json())
\ No newline at end of file
+logger.info("settings.inited {}", settings.model_dump_json())
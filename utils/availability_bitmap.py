@@ -0,0 +1,47 @@
+"""
+Битовая карта недели ментора: 7 дней x 48 получасовых слотов = 336 бит (42 байта).
+
+Бит ``day * 48 + i`` выставлен, если отметка ``i * 30`` минут дня ``day``
+попадает в один из промежутков ``mentor_time`` (границы включаются).
+В БД хранится в ``mentors.availability_bitmap`` как little-endian байты.
+"""
+from datetime import time
+from typing import Iterable, Optional
+
+SLOTS_PER_DAY = 48
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+BITMAP_BYTES = SLOTS_PER_WEEK // 8
+
+
+def slot_index(day: int, value: time) -> int:
+    return day * SLOTS_PER_DAY + value.hour * 2 + value.minute // 30
+
+
+def slot_time(index: int) -> tuple[int, time]:
+    day, slot = divmod(index, SLOTS_PER_DAY)
+    return day, time(slot // 2, slot % 2 * 30)
+
+
+def bitmap_from_intervals(intervals: Iterable[tuple[int, time, time]]) -> int:
+    """``intervals`` -- тройки ``(day, time_start, time_end)``."""
+    bitmap = 0
+    for day, time_start, time_end in intervals:
+        first = -(-(time_start.hour * 60 + time_start.minute) // 30)
+        last = (time_end.hour * 60 + time_end.minute) // 30
+        if first > last:
+            continue
+        width = last - first + 1
+        bitmap |= ((1 << width) - 1) << (day * SLOTS_PER_DAY + first)
+    return bitmap
+
+
+def bitmap_to_bytes(bitmap: int) -> bytes:
+    return bitmap.to_bytes(BITMAP_BYTES, "little")
+
+
+def bitmap_from_bytes(raw: Optional[bytes]) -> int:
+    return int.from_bytes(raw, "little") if raw else 0
+
+
+def bitmap_slots(bitmap: int) -> list[int]:
+    return [index for index in range(SLOTS_PER_WEEK) if bitmap >> index & 1]
@@ -0,0 +1,39 @@
+"""
+Условные GET-запросы: ETag, If-None-Match и 304 Not Modified.
+
+ETag считается до чтения данных: если запись случится во время чтения,
+ответ получит старый ETag и следующий запрос просто перечитает данные.
+"""
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Ответы зависят от пользователя (авторизация), поэтому private; no-cache -- всегда сверять ETag
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # сравнение для If-None-Match слабое: W/"x" совпадает с "x"
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, etag: str, vary: Optional[str] = None) -> Optional[Response]:
+    """
+    Готовый ответ 304, если клиент прислал актуальный ETag, иначе ``None``.
+    ``vary`` -- тот же ``Vary``, что у полного ответа: 304 обновляет заголовки закэшированного.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if vary is not None:
+            headers["Vary"] = vary
+        return Response(status_code=304, headers=headers)
+    return None
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
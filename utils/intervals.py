@@ -0,0 +1,48 @@
+from datetime import datetime, time
+from typing import Iterable, TypeVar
+
+T = TypeVar("T")
+
+MINUTES_PER_DAY = 24 * 60
+LAST_MINUTE_OF_DAY = MINUTES_PER_DAY - 1  # 23:59: ``time`` не выражает 24:00
+
+
+def minute_of_week(day: int, value: time) -> int:
+    """Минута недели, 0 -- понедельник 00:00. Секунды отбрасываются."""
+    return day * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def minute_of_week_from_datetime(value: datetime) -> int:
+    return minute_of_week(value.weekday(), value.time())
+
+
+def time_of_minute(minute: int) -> time:
+    """Минута дня (0..1439) -> ``time``."""
+    return time(minute // 60, minute % 60)
+
+
+def call_minutes(call_time: datetime, duration: int) -> tuple[int, int]:
+    """
+    Минуты дня ``[начало, конец]`` звонка длительностью ``duration``.
+
+    Звонок, заканчивающийся после полуночи, обрезается до 23:59: иначе конец
+    ``(call_time + duration).time()`` оказался бы раньше начала.
+    """
+    start = call_time.hour * 60 + call_time.minute
+    return start, min(start + duration, LAST_MINUTE_OF_DAY)
+
+
+def merge_intervals(intervals: Iterable[tuple[T, T]]) -> list[tuple[T, T]]:
+    """
+    Сливает пересекающиеся и соприкасающиеся отрезки ``[start, end]``.
+
+    Сортировка + один проход, O(n log n). Результат упорядочен по началу.
+    """
+    merged: list[tuple[T, T]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
@@ -1,116 +1,117 @@
-from fastapi import FastAPI, Request, Response, status
-from fastapi.routing import APIRoute
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-from loguru import logger
-from uuid import UUID
-from typing import Callable, List
 import json
-from base64 import b64decode
-
-class JWTAuthMiddleware(BaseHTTPMiddleware):
-    def __init__(
-        self,
-        app: FastAPI,
-        exclude_paths: List[str] = None,
-    ):
-        super().__init__(app)
-        self.exclude_paths = exclude_paths or ["/docs", "/redoc", "/openapi.json"]
-        logger.info(f"JWT Auth Middleware initialized with excluded paths: {self.exclude_paths}")
+import re
+from base64 import urlsafe_b64decode
+from typing import Iterable, Optional
+from uuid import UUID
+
+from loguru import logger
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """
-        Process each request through the middleware.
-        
-        Args:
-            request: The incoming request
-            call_next: The next middleware/route handler
-            
-        Returns:
-            Response: The response from the route handler
-        """
-        # Skip authorization for OPTIONS requests (CORS preflight)
-        if request.method == "OPTIONS":
-            logger.debug(f"Skipping authentication for OPTIONS request: {request.url.path}")
-            return await call_next(request)
-            
-        # Check if the path is excluded from authentication
-        for path in self.exclude_paths:
-            if request.url.path.startswith(path):
-                logger.debug(f"Skipping authentication for excluded path: {request.url.path}")
-                return await call_next(request)
-
-        # Get the authorization header
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            logger.error(f"Authorization header missing for path: {request.url.path}")
-            return Response(
-                content='{"detail":"Authorization header is required"}',
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                media_type="application/json"
-            )
-        
-        # Extract token from Authorization header
-        token = auth_header.replace("Bearer ", "").strip()
-        
-        # Try to process token as JWT
-        if '.' in token and len(token.split('.')) == 3:
-            try:
-                # Разделяем JWT на части
-                header_b64, payload_b64, signature = token.split('.')
-                
-                # Декодируем payload из base64
-                # Нормализуем base64 строку, добавляя padding если необходимо
-                padding_needed = len(payload_b64) % 4
-                if padding_needed:
-                    payload_b64 += '=' * (4 - padding_needed)
-                
-                try:
-                    # Иногда base64 содержит URL-safe символы
-                    payload_b64 = payload_b64.replace('-', '+').replace('_', '/')
-                    payload_bytes = b64decode(payload_b64)
-                    payload = json.loads(payload_bytes)
-                    logger.debug(f"Decoded JWT payload: {payload}")
-                    
-                    # Ищем uid в payload
-                    if 'uid' in payload:
-                        user_id = UUID(payload['uid'])
-                        logger.info(f"User {user_id} authenticated for path: {request.url.path} with JWT")
-                        request.state.user_id = user_id
-                        return await call_next(request)
-                    else:
-                        logger.error("JWT payload does not contain uid field")
-                        return Response(
-                            content='{"detail":"Invalid JWT token format: missing uid"}',
-                            status_code=status.HTTP_401_UNAUTHORIZED,
-                            media_type="application/json"
-                        )
-                except Exception as e:
-                    logger.error(f"Error decoding JWT payload: {e}")
-                    return Response(
-                        content='{"detail":"Invalid JWT token format"}',
-                        status_code=status.HTTP_401_UNAUTHORIZED,
-                        media_type="application/json"
-                    )
-            except Exception as e:
-                logger.error(f"Error processing JWT token: {e}")
-                # Если не удалось обработать как JWT, пробуем как простой UUID
-                pass
-
-        # Try to handle as direct UUID
+from utils.token_verifier import InvalidTokenError, token_verifier
+
+DEFAULT_EXCLUDE_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+
+def decode_token(token: str) -> UUID:
+    """
+    Extract user_id from a bearer token without checking the signature:
+    a JWT with a ``uid`` claim or a bare UUID.
+
+    Raises:
+        InvalidTokenError: with the detail to return in the 401 response
+    """
+    parts = token.split(".")
+    if len(parts) == 3:
         try:
-            user_id = UUID(token)
-            logger.info(f"User {user_id} authenticated for path: {request.url.path}")
-            
-            # Store user_id in request state for handlers to use
-            request.state.user_id = user_id
-            
-            # Continue to next middleware or route handler
-            return await call_next(request)
+            payload_b64 = parts[1]
+            payload = json.loads(urlsafe_b64decode(payload_b64 + "=" * (-len(payload_b64) % 4)))
+        except Exception as e:
+            logger.error(f"Error decoding JWT payload: {e}")
+            raise InvalidTokenError("Invalid JWT token format")
+        if not isinstance(payload, dict) or "uid" not in payload:
+            logger.error("JWT payload does not contain uid field")
+            raise InvalidTokenError("Invalid JWT token format: missing uid")
+        try:
+            return UUID(str(payload["uid"]))
         except ValueError:
-            logger.error(f"Invalid user_id format in token: {auth_header}")
-            return Response(
-                content='{"detail":"Invalid authorization token"}',
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                media_type="application/json"
-            ) 
\ No newline at end of file
+            raise InvalidTokenError("Invalid JWT token format")
+
+    try:
+        return UUID(token)
+    except ValueError:
+        raise InvalidTokenError("Invalid authorization token")
+
+
+async def authenticate(token: str) -> UUID:
+    """
+    Resolve the user_id of a bearer token.
+
+    JWTs are verified (signature, expiry, audience, issuer) by ``token_verifier`` when
+    ``settings.auth`` configures keys, and decoded without verification otherwise.
+    Bare UUID tokens (legacy clients) are accepted only while signatures are not verified.
+
+    Raises:
+        InvalidTokenError: with the detail to return in the 401 response
+    """
+    if token.count(".") == 2:
+        if token_verifier.enabled:
+            return await token_verifier.verify(token)
+        return decode_token(token)
+    if token_verifier.enabled:
+        raise InvalidTokenError("Invalid authorization token")
+    return decode_token(token)
+
+
+def _bearer_token(authorization: str) -> str:
+    return authorization.replace("Bearer ", "").strip()
+
+
+class JWTAuthMiddleware:
+    """
+    Pure ASGI authentication layer.
+
+    Decodes the Authorization header once per request and stores the result in
+    ``scope["state"]["user_id"]`` (``request.state.user_id``), where ``extract_user_id`` reads it.
+    OPTIONS requests (CORS preflight) and paths starting with one of ``exclude_paths`` pass through.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Optional[Iterable[str]] = None) -> None:
+        self.app = app
+        self.exclude_paths = list(exclude_paths or DEFAULT_EXCLUDE_PATHS)
+        # one prefix match instead of a startswith loop per request
+        self._excluded = re.compile("|".join(re.escape(path) for path in self.exclude_paths)) \
+            if self.exclude_paths else None
+        logger.info(f"JWT Auth Middleware initialized with excluded paths: {self.exclude_paths}")
+        if not token_verifier.enabled:
+            logger.warning("JWT signatures are not verified: no jwt_secret, jwks_file or jwks_url in auth settings")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" \
+                or (self._excluded is not None and self._excluded.match(scope["path"])):
+            await self.app(scope, receive, send)
+            return
+
+        authorization = None
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                authorization = value.decode("latin-1")
+                break
+        if not authorization:
+            logger.error(f"Authorization header missing for path: {scope['path']}")
+            await self._reject("Authorization header is required", scope, receive, send)
+            return
+
+        try:
+            user_id = await authenticate(_bearer_token(authorization))
+        except InvalidTokenError as e:
+            logger.error(f"Rejected token for path {scope['path']}: {e}")
+            await self._reject(str(e), scope, receive, send)
+            return
+
+        scope.setdefault("state", {})["user_id"] = user_id
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(detail: str, scope: Scope, receive: Receive, send: Send) -> None:
+        await JSONResponse({"detail": detail}, status_code=401)(scope, receive, send)
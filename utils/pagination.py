@@ -0,0 +1,61 @@
+import base64
+import json
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Generic, Optional, Sequence, TypeVar
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+T = TypeVar("T")
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(*values) -> str:
+    """Непрозрачный курсор из значений ключа последней строки страницы."""
+    raw = json.dumps([str(value) for value in values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> list[str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def decode_id_cursor(cursor: Optional[str]) -> Optional[uuid.UUID]:
+    """Курсор страниц, упорядоченных по первичному ключу."""
+    if not cursor:
+        return None
+    values = decode_cursor(cursor)
+    try:
+        return uuid.UUID(values[0])
+    except (IndexError, ValueError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def build_page(rows: Sequence[T], limit: int, key: Callable[[T], tuple]) -> Page[T]:
+    """
+    Собирает страницу из ``limit + 1`` строк, выбранных репозиторием.
+
+    Лишняя строка означает, что есть следующая страница.
+    """
+    items = list(rows[:limit])
+    next_cursor = encode_cursor(*key(items[-1])) if len(rows) > limit else None
+    return Page(items=items, next_cursor=next_cursor)
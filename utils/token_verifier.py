@@ -0,0 +1,209 @@
+"""
+JWT signature and expiry verification.
+
+Verified tokens are cached in a bounded LRU keyed by the SHA-256 digest of the token,
+and an entry never outlives the token's ``exp``, so a repeated token costs a hash and a
+dict lookup. Keys come from ``settings.auth``: a shared secret for HS* tokens, a JWKS
+file (re-read when it changes) and/or a JWKS URL. Key sets are refreshed periodically and
+when a token names an unknown ``kid``, which is how key rotation is picked up.
+
+The token's ``alg`` header only selects among what is configured: HS* tokens are checked
+against the secret only, and a JWKS key only accepts its own algorithm (its ``alg`` or the
+default for its key type). Symmetric keys in a JWKS are ignored.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from typing import Any, Optional
+from uuid import UUID
+
+import httpx
+import jwt
+from loguru import logger
+
+from settings.settings import settings
+from utils.ttl_cache import MISSING, TTLCache
+
+
+# Алгоритм ключа JWKS без "alg" -- по kty и crv, как в PyJWK
+_DEFAULT_ALGORITHMS = {
+    ("RSA", None): "RS256",
+    ("EC", "P-256"): "ES256",
+    ("EC", "P-384"): "ES384",
+    ("EC", "P-521"): "ES512",
+    ("OKP", "Ed25519"): "EdDSA",
+}
+
+
+class InvalidTokenError(ValueError):
+    """Token is rejected; the message is the 401 detail."""
+
+
+class KeyStore:
+    def __init__(self, auth) -> None:
+        self.auth = auth
+        self._keys: dict[Optional[str], tuple[str, jwt.PyJWK]] = {}  # kid -> (алгоритм, ключ)
+        self._loaded_at: Optional[float] = None
+        self._retry_after = 0.0  # после неудачной загрузки -- не раньше этого времени
+        self._file_mtime: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.auth.jwt_secret or self.auth.jwks_file or self.auth.jwks_url)
+
+    async def key_for(self, header: dict) -> Any:
+        """Ключ для проверки токена; ``alg`` из заголовка должен совпадать с алгоритмом ключа."""
+        algorithm = header.get("alg")
+        if not isinstance(algorithm, str) or algorithm not in self.auth.algorithms:
+            raise InvalidTokenError("Invalid JWT token algorithm")
+        if algorithm.startswith("HS"):
+            # HMAC -- только с общим секретом, никогда с ключом из JWKS
+            if not self.auth.jwt_secret:
+                raise InvalidTokenError("Invalid JWT token algorithm")
+            return self.auth.jwt_secret.get_secret_value()
+        if not (self.auth.jwks_file or self.auth.jwks_url):
+            raise InvalidTokenError("Unknown JWT signing key")
+
+        kid = header.get("kid")
+        now = time.monotonic()
+        if now >= self._retry_after and (self._loaded_at is None or now - self._loaded_at > self.auth.jwks_refresh_interval
+                                         or self._file_changed()):
+            await self.refresh()
+        entry = self._find(kid)
+        if entry is None:
+            # возможно, ключи ротировали -- перечитываем, но не чаще jwks_min_refresh_interval
+            await self.refresh(rotation=True)
+            entry = self._find(kid)
+        if entry is None:
+            raise InvalidTokenError("Unknown JWT signing key")
+        key_algorithm, key = entry
+        if key_algorithm != algorithm:
+            raise InvalidTokenError("Invalid JWT token algorithm")
+        return key.key
+
+    def _file_changed(self) -> bool:
+        if not self.auth.jwks_file:
+            return False
+        try:
+            return os.stat(self.auth.jwks_file).st_mtime != self._file_mtime
+        except OSError:
+            return False
+
+    def _find(self, kid: Optional[str]) -> Optional[tuple[str, jwt.PyJWK]]:
+        entry = self._keys.get(kid)
+        if entry is None and kid is None and len(self._keys) == 1:
+            entry = next(iter(self._keys.values()))
+        return entry
+
+    async def refresh(self, rotation: bool = False) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            # после ошибки не чаще jwks_min_refresh_interval -- и по расписанию, и при ротации
+            if now < self._retry_after:
+                return
+            if rotation and self._loaded_at is not None \
+                    and now - self._loaded_at < self.auth.jwks_min_refresh_interval:
+                return
+            keys: dict[Optional[str], tuple[str, jwt.PyJWK]] = {}
+            try:
+                if self.auth.jwks_file:
+                    keys.update(self._load_file())
+                if self.auth.jwks_url:
+                    keys.update(await self._load_url())
+            except Exception as e:
+                # оставляем прежние ключи, попробуем снова через jwks_min_refresh_interval
+                logger.error(f"JWKS refresh failed, keeping {len(self._keys)} cached keys: {e}")
+                self._retry_after = now + self.auth.jwks_min_refresh_interval
+                return
+            self._keys = keys
+            self._loaded_at = now
+            logger.info(f"JWKS loaded: {len(keys)} keys")
+
+    def _load_file(self) -> dict[Optional[str], tuple[str, jwt.PyJWK]]:
+        with open(self.auth.jwks_file, "rb") as f:
+            self._file_mtime = os.fstat(f.fileno()).st_mtime
+            return self._parse(json.load(f))
+
+    async def _load_url(self) -> dict[Optional[str], tuple[str, jwt.PyJWK]]:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.get(self.auth.jwks_url)
+            response.raise_for_status()
+            return self._parse(response.json())
+
+    @staticmethod
+    def _parse(jwks: dict) -> dict[Optional[str], tuple[str, jwt.PyJWK]]:
+        keys = {}
+        for data in jwks.get("keys", []):
+            kty = data.get("kty")
+            algorithm = data.get("alg") or _DEFAULT_ALGORITHMS.get((kty, None if kty == "RSA" else data.get("crv")))
+            if not algorithm or algorithm.startswith("HS") or kty == "oct":
+                logger.warning(f"Skipping JWKS key {data.get('kid')}: symmetric or unsupported key type {kty}")
+                continue
+            try:
+                keys[data.get("kid")] = (algorithm, jwt.PyJWK(data, algorithm))
+            except (jwt.PyJWTError, ValueError, TypeError) as e:
+                logger.warning(f"Skipping JWKS key {data.get('kid')}: {e}")
+        return keys
+
+
+class TokenVerifier:
+    def __init__(self, auth) -> None:
+        self.auth = auth
+        self.keys = KeyStore(auth)
+        self._cache = TTLCache(auth.token_cache_size, auth.token_cache_ttl)
+
+    @property
+    def enabled(self) -> bool:
+        return self.keys.enabled
+
+    async def verify(self, token: str) -> UUID:
+        digest = hashlib.sha256(token.encode()).digest()
+        user_id = self._cache.get(digest)
+        if user_id is not MISSING:
+            return user_id
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            raise InvalidTokenError("Invalid JWT token format")
+        key = await self.keys.key_for(header)  # проверяет и alg из заголовка
+
+        try:
+            claims = jwt.decode(
+                token, key,
+                algorithms=[header["alg"]],
+                audience=self.auth.audience,
+                issuer=self.auth.issuer,
+                leeway=self.auth.leeway,
+                options={"require": ["exp"] if self.auth.require_exp else [],
+                         "verify_aud": self.auth.audience is not None},
+            )
+        except jwt.ExpiredSignatureError:
+            raise InvalidTokenError("JWT token has expired")
+        except Exception as e:
+            # PyJWTError, а также TypeError/ValueError от ключа неподходящего типа
+            logger.error(f"JWT verification failed: {e!r}")
+            raise InvalidTokenError("Invalid JWT token")
+
+        if "uid" not in claims:
+            raise InvalidTokenError("Invalid JWT token format: missing uid")
+        try:
+            user_id = UUID(str(claims["uid"]))
+        except ValueError:
+            raise InvalidTokenError("Invalid JWT token format")
+
+        ttl = self.auth.token_cache_ttl
+        if "exp" in claims:
+            ttl = min(ttl, float(claims["exp"]) + self.auth.leeway - time.time())
+        if ttl > 0:
+            self._cache.set(digest, user_id, ttl)
+        return user_id
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+token_verifier = TokenVerifier(settings.auth)
@@ -1,21 +1,267 @@
 # ==ТЕРПИМ КАРЛИКИ== ==ТЕРПИМ КАРЛИКИ== ==ТЕРПИМ КАРЛИКИ== ==ТЕРПИМ КАРЛИКИ== ==ТЕРПИМ КАРЛИКИ==
-import asyncio
+"""
+Запуск сервиса.
+
+При ``settings.uvicorn.workers > 1`` родительский процесс открывает сокет и форкает воркеры,
+которые принимают соединения с одного сокета. Приложение импортируется уже в воркере,
+поэтому у каждого свои движок, пул соединений и кэши.
+
+Несколько воркеров требуют ``cache.redis_url``: индексы расписания, каталог и поиск живут
+в памяти воркера и узнают об изменениях, сделанных другими воркерами, только через Redis.
+Без него supervisor не запускается.
+
+Сигналы родителю:
+    SIGTERM / SIGINT -- мягкая остановка всех воркеров;
+    SIGHUP -- rolling reload: воркеры по одному заменяются новыми (с новым кодом),
+              старый останавливается только после того, как новый поднялся.
+Упавший воркер перезапускается, при повторных падениях -- с нарастающей задержкой.
+"""
+import os
+import select
+import signal
+import socket
+import time
+from typing import Optional
 
 import uvicorn
-from presentations.fastapi_app import app
+from loguru import logger
+
 from settings.settings import settings
 
-async def main() -> None:
-    server = uvicorn.Server(
-        uvicorn.Config(
-            app,
-            host=settings.uvicorn.host,
-            port=settings.uvicorn.port,
-            workers=settings.uvicorn.workers,
-        )
+try:
+    import uvloop  # noqa: F401
+    LOOP = "uvloop"
+except ImportError:  # pragma: no cover - uvloop необязателен
+    LOOP = "asyncio"
+
+try:
+    import httptools  # noqa: F401
+    HTTP = "httptools"
+except ImportError:  # pragma: no cover - httptools необязателен
+    HTTP = "h11"
+
+APP = "presentations.fastapi_app:app"
+MIN_UPTIME = 5.0  # сек; воркер, упавший раньше, считается падающим при старте
+MAX_RESTART_DELAY = 30.0
+
+
+def build_config() -> uvicorn.Config:
+    return uvicorn.Config(
+        APP,
+        host=settings.uvicorn.host,
+        port=settings.uvicorn.port,
+        loop=LOOP,
+        http=HTTP,
+        backlog=settings.uvicorn.backlog,
+        timeout_graceful_shutdown=settings.uvicorn.graceful_timeout,
     )
-    await server.serve()
+
+
+class _WorkerServer(uvicorn.Server):
+    """Сообщает родителю о готовности, когда lifespan отработал и сокет слушается."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int) -> None:
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets: Optional[list[socket.socket]] = None) -> None:
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, sock: socket.socket, workers: int) -> None:
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.slots: dict[int, int] = {}  # pid -> номер воркера
+        self.started_at: dict[int, float] = {}
+        self.ready_fds: dict[int, int] = {}
+        self.retiring: set[int] = set()  # остановлены намеренно, не перезапускать
+        self.restart_delay: dict[int, float] = {}
+        self.pending: dict[int, float] = {}  # номер воркера -> когда перезапустить
+        self.should_exit = False
+        self.reload_requested = False
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_exit_signal)
+        signal.signal(signal.SIGINT, self._on_exit_signal)
+        signal.signal(signal.SIGHUP, self._on_reload_signal)
+        logger.info(f"Supervisor {os.getpid()}: starting {self.workers} workers (loop={LOOP}, http={HTTP})")
+
+        for slot in range(self.workers):
+            pid = self.spawn(slot)
+            if not self.wait_ready(pid):
+                logger.error(f"Worker {slot} failed to start, shutting down")
+                self.stop_all()
+                return 1
+
+        while not self.should_exit:
+            self.reap()
+            self.restart_pending()
+            if self.reload_requested:
+                self.reload_requested = False
+                self.rolling_reload()
+            time.sleep(0.2)
+
+        self.stop_all()
+        logger.info("Supervisor stopped")
+        return 0
+
+    def _on_exit_signal(self, signum, frame) -> None:
+        self.should_exit = True
+
+    def _on_reload_signal(self, signum, frame) -> None:
+        self.reload_requested = True
+
+    def spawn(self, slot: int) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for fd in self.ready_fds.values():
+                os.close(fd)
+            code = 1
+            try:
+                # обработчики SIGINT/SIGTERM ставит сам uvicorn
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGHUP, signal.SIG_IGN)
+                _WorkerServer(self.config, write_fd).run(sockets=[self.sock])
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {slot} crashed")
+            finally:
+                os._exit(code)
+
+        os.close(write_fd)
+        self.slots[pid] = slot
+        self.started_at[pid] = time.monotonic()
+        self.ready_fds[pid] = read_fd
+        logger.info(f"Worker {slot} started, pid {pid}")
+        return pid
+
+    def wait_ready(self, pid: int) -> bool:
+        """Ждет сигнала готовности воркера; False, если воркер умер или не успел за startup_timeout."""
+        fd = self.ready_fds.pop(pid)
+        try:
+            readable, _, _ = select.select([fd], [], [], settings.uvicorn.startup_timeout)
+            # EOF (пустое чтение) -- воркер завершился, не дойдя до готовности
+            return bool(readable) and os.read(fd, 1) == b"1"
+        finally:
+            os.close(fd)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            slot = self.slots.pop(pid, None)
+            started_at = self.started_at.pop(pid, time.monotonic())
+            fd = self.ready_fds.pop(pid, None)
+            if fd is not None:
+                os.close(fd)
+            if slot is None or pid in self.retiring:
+                self.retiring.discard(pid)
+                continue
+            if self.should_exit:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if time.monotonic() - started_at < MIN_UPTIME:
+                delay = min(max(self.restart_delay.get(slot, 0.5) * 2, 1.0), MAX_RESTART_DELAY)
+            else:
+                delay = 0.0
+            self.restart_delay[slot] = delay
+            self.pending[slot] = time.monotonic() + delay
+            logger.error(f"Worker {slot} (pid {pid}) exited with code {code}, restarting in {delay:.1f}s")
+
+    def restart_pending(self) -> None:
+        now = time.monotonic()
+        for slot, due in list(self.pending.items()):
+            if due <= now:
+                del self.pending[slot]
+                self.spawn(slot)
+
+    def rolling_reload(self) -> None:
+        logger.info("Rolling reload started")
+        for old_pid, slot in list(self.slots.items()):
+            if self.should_exit:
+                return
+            if old_pid not in self.slots:  # упал во время reload и уже перезапускается
+                continue
+            new_pid = self.spawn(slot)
+            if not self.wait_ready(new_pid):
+                logger.error(f"Rolling reload aborted: new worker {slot} (pid {new_pid}) failed to start")
+                self.retire(new_pid)
+                return
+            self.retire(old_pid)
+        logger.info("Rolling reload finished")
+
+    def retire(self, pid: int) -> None:
+        """Мягко останавливает воркер и ждет его завершения (после graceful_timeout -- SIGKILL)."""
+        self.retiring.add(pid)
+        self.slots.pop(pid, None)
+        self._terminate([pid])
+
+    def stop_all(self) -> None:
+        self.pending.clear()
+        pids = list(self.slots)
+        self.retiring.update(pids)
+        self.slots.clear()
+        self._terminate(pids)
+
+    def _terminate(self, pids: list[int]) -> None:
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + settings.uvicorn.graceful_timeout + 5
+        alive = set(pids)
+        while alive:
+            for pid in list(alive):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    alive.discard(pid)
+                    self.retiring.discard(pid)
+                    self.started_at.pop(pid, None)
+                    fd = self.ready_fds.pop(pid, None)
+                    if fd is not None:
+                        os.close(fd)
+            if alive and time.monotonic() > deadline:
+                for pid in alive:
+                    logger.warning(f"Worker pid {pid} did not stop in time, killing")
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.1)
+
+
+def main() -> int:
+    config = build_config()
+    workers = settings.uvicorn.workers
+    if workers > 1 and not hasattr(os, "fork"):
+        logger.warning(f"workers={workers} requires fork, running a single process")
+        workers = 1
+    if workers <= 1:
+        uvicorn.Server(config).run()
+        return 0
+    if not settings.cache.redis_url:
+        # без общего канала инвалидации воркеры принимали бы брони в уже удаленные окна
+        logger.error(f"workers={workers} requires cache.redis_url (APP_CACHE__REDIS_URL): "
+                     f"in-process indexes are invalidated across workers only through Redis")
+        return 1
+
+    sock = config.bind_socket()
+    return Supervisor(config, sock, workers).run()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    raise SystemExit(main())